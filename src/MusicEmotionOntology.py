@@ -1,4 +1,10 @@
 from owlready2 import *
+import os
+
+# set MEO_WORLD to a sqlite file to keep the ontology and the processed tracks in a persistent quadstore
+PERSISTENT_WORLD = os.environ.get("MEO_WORLD")
+if PERSISTENT_WORLD:
+    default_world.set_backend(filename=PERSISTENT_WORLD)
 
 onto = get_ontology("http://www.semanticweb.org/musicEmotionOntology#")
 mto = onto.get_namespace("http://purl.org/ontology/mto/")
@@ -125,6 +131,21 @@ with onto:
         domain = [Track]
         range = [float]
 
+    class trackHasContentHash(DataProperty, FunctionalProperty):
+        comment = "Class that defines the sha256 of the file the track was created from"
+        domain = [Track]
+        range = [str]
+
+    class trackHasComposer(DataProperty, FunctionalProperty):
+        comment = "Class that defines the composer of the track"
+        domain = [Track]
+        range = [str]
+
+    class trackHasWork(DataProperty, FunctionalProperty):
+        comment = "Class that defines the work (e.g. the collection or the movement) the track belongs to"
+        domain = [Track]
+        range = [str]
+
     class meterHasPosition(DataProperty):
         domain = [Meter]
         range = [str]
@@ -1004,8 +1025,78 @@ with onto:
         return df
 
 
-    onto.save("MusicEmotionsOntology.owl", 'rdfxml')
-    create_instances()
+    def create_triggers_lookup():
+        """
+        function that creates a dictionary of musical feature class -> emotional effects it triggers,
+        the triggers are declared on the classes so no reasoning is needed
+        """
+        lookup = {}
+        for cls in onto.classes():
+            if issubclass(cls, onto.MusicalFeature):
+                lookup[cls] = list(cls.triggers) if hasattr(cls, 'triggers') else []
+        return lookup
+
+
+    def bulk_add_triples(triples, ontology=onto):
+        """
+        function that writes a batch of (subject, property, value) triples to the quadstore of the ontology with one
+        executemany per table, instead of one subject.property.append(value) for every value.
+        the rows are written in owlready's current transaction (committed when the world is saved), a triple that is
+        already in the quadstore (or twice in the batch, e.g. 2 staccato notes in a meter) is ignored like .append does
+        """
+        from owlready2.base import to_literal
+
+        c = ontology.graph.c
+        objs = []
+        datas = []
+        touched = set()
+        for subject, prop, value in triples:
+            if isinstance(prop, DataPropertyClass):
+                o, d = to_literal(value)
+                datas.append((c, subject.storid, prop.storid, o, d))
+            else:
+                objs.append((c, subject.storid, prop.storid, value.storid))
+                if prop.inverse_property:
+                    touched.add((value, prop.inverse_property))
+            touched.add((subject, prop))
+
+        db = ontology.world.graph.db
+        if objs:
+            db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", objs)
+        if datas:
+            db.executemany("INSERT OR IGNORE INTO datas VALUES (?,?,?,?,?)", datas)
+
+        # owlready keeps the values it has already loaded, they are loaded again from the quadstore when needed
+        for entity, prop in touched:
+            if not isinstance(entity, ThingClass):
+                entity.__dict__.pop(prop.python_name, None)
+
+
+    def bulk_add_types(pairs, ontology=onto):
+        """
+        function that asserts (individual, class) memberships with one executemany, the classes of the individuals
+        in memory are updated without writing them again (a membership they already have is ignored)
+        """
+        c = ontology.graph.c
+        pairs = [(individual, cls) for individual, cls in dict.fromkeys(pairs) if cls not in individual.is_a]
+        ontology.world.graph.db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)",
+                                            [(c, individual.storid, rdf_type, cls.storid) for individual, cls in pairs])
+        with LOADING:
+            for individual, cls in pairs:
+                individual.is_a.append(cls)
+
+
+    def save_ontology(file="MusicEmotionsOntology.owl", format="rdfxml"):
+        """
+        function that serializes the ontology, importing this module only declares the classes
+        """
+        onto.save(file, format)
+
+
+# python MusicEmotionOntology.py [file] writes the ontology file
+if __name__ == "__main__":
+    import sys
+    save_ontology(*sys.argv[1:2])
     #create_triggers_table()
     
 
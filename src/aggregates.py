@@ -0,0 +1,159 @@
+import MusicEmotionOntology as meo
+
+
+# materialized counts of the features and intervals of the meters, kept in tables of the quadstore's database
+# (saved with a persistent world) and updated when a track is added or removed, so the composer comparisons of
+# Q2, Q3 and Q7 read the counts instead of grouping all the meters on every query.
+#   feature_counts: number of meters of a track (of a valence meter class) with a musical feature (or an interval)
+#   interval_counts: number of notes pairs and of meters of a composer with an (interval, duration)
+# a track without composer has the composer '' and an interval without duration the duration ''.
+# the features have the names of the query results (sparql_queries.value_name): the name of the instance of the
+# feature class (andante_instance), or of the class for the dynamic shapes and rhythm changes (Crescendo)
+
+TABLES = [
+    """CREATE TABLE IF NOT EXISTS feature_counts (composer TEXT, track TEXT, meter_class TEXT, feature TEXT,
+       count INTEGER, PRIMARY KEY (composer, track, meter_class, feature))""",
+    """CREATE TABLE IF NOT EXISTS interval_counts (composer TEXT, interval TEXT, duration TEXT,
+       count INTEGER, meters INTEGER, PRIMARY KEY (composer, interval, duration))""",
+]
+
+
+def database(world=meo.default_world):
+    """
+    function that returns the database of the world with the count tables
+    """
+    db = world.graph.db
+    for table in TABLES:
+        db.execute(table)
+    return db
+
+
+# features that are appended to the meters as classes (parseXML.feature_triples)
+CLASS_FEATURES = ('hasDynamicShape', 'hasRhythmChange')
+
+
+def instance_name(class_name):
+    """
+    function that returns the name of the instance of a feature class (meo.create_instances)
+    """
+    return class_name.lower() + "_instance"
+
+
+def meter_feature_names(extracted, features):
+    """
+    function that returns the names of the musical features of a meter (MeterFeatures) of an extracted track:
+    its features, its intervals, its mode (or the mode of the track) and the tempo of the track
+    """
+    names = {class_name if prop in CLASS_FEATURES else instance_name(class_name)
+             for prop, class_name in features.feature_items()}
+    names.update(instance_name(interval) for interval, _ in features.interval_counts())
+    if extracted['mode'] and not features.mode():
+        names.add(instance_name(extracted['mode']))
+    names.add(instance_name(extracted['tempo']))
+    return names
+
+
+def add_track(extracted, meter_classes, world=meo.default_world):
+    """
+    function that adds the counts of the meters of an extracted track, meter_classes are the names of the valence
+    meter classes of its meters ('' for a meter without class, see meter_classes.classify_meters)
+    """
+    composer = extracted.get('composer') or ''
+    features = {}
+    intervals = {}
+    for meter, meter_class in zip(extracted['meters'], meter_classes):
+        for name in meter_feature_names(extracted, meter):
+            key = (meter_class, name)
+            features[key] = features.get(key, 0) + 1
+        for (interval, duration), count in meter.interval_counts().items():
+            key = (instance_name(interval), duration or '')
+            pairs, meters = intervals.get(key, (0, 0))
+            intervals[key] = (pairs + count, meters + 1)
+
+    db = database(world)
+    db.executemany("""INSERT INTO feature_counts VALUES (?,?,?,?,?)
+                      ON CONFLICT (composer, track, meter_class, feature) DO UPDATE SET count = count + excluded.count""",
+                   [(composer, extracted['title'], meter_class, name, count)
+                    for (meter_class, name), count in features.items()])
+    db.executemany("""INSERT INTO interval_counts VALUES (?,?,?,?,?)
+                      ON CONFLICT (composer, interval, duration) DO UPDATE SET count = count + excluded.count,
+                      meters = meters + excluded.meters""",
+                   [(composer, interval, duration, count, meters)
+                    for (interval, duration), (count, meters) in intervals.items()])
+
+
+def remove_track(track, world=meo.default_world):
+    """
+    function that removes the counts of a track of the world (before its meters are destroyed)
+    """
+    composer = track.trackHasComposer or ''
+    intervals = {}
+    for meter in track.trackHasMeter:
+        for mf in meter.hasMusicalFeature:
+            if isinstance(mf, meo.IntervalCount):
+                duration = mf.hasDuration[0] if mf.hasDuration else ''
+                key = (mf.hasInterval[0].name, duration)
+                pairs, meters = intervals.get(key, (0, 0))
+                intervals[key] = (pairs + mf.hasIntervalCount[0], meters + 1)
+
+    db = database(world)
+    db.execute("DELETE FROM feature_counts WHERE track = ?", (track.name,))
+    db.executemany("""UPDATE interval_counts SET count = count - ?, meters = meters - ?
+                      WHERE composer = ? AND interval = ? AND duration = ?""",
+                   [(count, meters, composer, interval, duration)
+                    for (interval, duration), (count, meters) in intervals.items()])
+    db.execute("DELETE FROM interval_counts WHERE meters <= 0")
+
+
+def read_counts(query, group, composer, params=(), group_params=(), world=meo.default_world):
+    """
+    function that executes a query of the count tables for a composer (all the composers if composer is None),
+    group is the end of the query (GROUP BY ...) and group_params its parameters
+    """
+    params = list(params)
+    if composer is not None:
+        query += " AND composer = ?"
+        params.append(composer)
+    return database(world).execute(query + " " + group, params + list(group_params)).fetchall()
+
+
+def composer_features(composer=None, min_count=3, world=meo.default_world):
+    """
+    function that returns the musical features of the meters of a composer by number of meters (Q2)
+    """
+    import pandas as pd
+
+    rows = read_counts("SELECT feature, SUM(count) AS c FROM feature_counts WHERE 1",
+                       "GROUP BY feature HAVING c >= ? ORDER BY c DESC", composer, group_params=[min_count], world=world)
+    return pd.DataFrame(rows, columns=['mf', 'c'])
+
+
+def composer_intervals(composer=None, world=meo.default_world):
+    """
+    function that returns the intervals of a composer by number of (meter, duration) pairs (Q3)
+    and their number of notes pairs
+    """
+    import pandas as pd
+
+    rows = read_counts("SELECT interval, SUM(meters) AS a, SUM(count) FROM interval_counts WHERE 1",
+                       "GROUP BY interval ORDER BY a DESC", composer, world=world)
+    return pd.DataFrame(rows, columns=['mf', 'a', 'pairs'])
+
+
+def meter_class_features(composer=None, meter_class='VeryPositiveValenceMeter', world=meo.default_world):
+    """
+    function that returns the musical features of the meters of a valence meter class by number of meters (Q7)
+    """
+    import pandas as pd
+
+    rows = read_counts("SELECT feature, SUM(count) AS meterCount FROM feature_counts WHERE meter_class = ?",
+                       "GROUP BY feature ORDER BY meterCount DESC", composer, [meter_class], world=world)
+    return pd.DataFrame(rows, columns=['mf', 'meterCount'])
+
+
+# queries that can read the counts instead: query name -> function(composer)
+MATERIALIZED = {
+    'Q2': composer_features,
+    'Q3': composer_intervals,
+    'Q7': meter_class_features,
+}
@@ -0,0 +1,80 @@
+# chord classification with a lookup table: the pitch class set of a chord is a 12 bit mask
+# (bit p is set if pitch class p is in the chord) and CHORD_TABLE[mask] is the name of its chord type class,
+# so a chord is classified with one list lookup instead of music21's commonName
+
+# (chord type class, intervals above the root), the first template that matches a pitch class set wins
+CHORD_TEMPLATES = [
+    ('SeventhMinorNinthChord', (0, 4, 7, 10, 1)),
+    ('SeventhMinorNinthChord', (0, 4, 10, 1)),  # without the fifth
+    ('NinthChord', (0, 4, 7, 10, 2)),
+    ('NinthChord', (0, 4, 10, 2)),
+    ('AddedNinthChord', (0, 4, 7, 2)),
+    ('AddedNinthChord', (0, 3, 7, 2)),
+    ('MajorSeventhChord', (0, 4, 7, 11)),
+    ('MajorSeventhChord', (0, 4, 11)),
+    ('MinorSeventhChord', (0, 3, 7, 10)),
+    ('DiminishedChord', (0, 3, 6, 9)),
+    ('DiminishedChord', (0, 3, 6)),
+    ('MajorChord', (0, 4, 7)),
+    ('MinorChord', (0, 3, 7)),
+    ('SuspendedFourthChord', (0, 5, 7)),
+]
+
+
+def pitch_class_mask(midis):
+    """
+    function that finds the pitch class set of a chord as a 12 bit mask
+    """
+    mask = 0
+    for midi in midis:
+        mask |= 1 << (midi % 12)
+    return mask
+
+
+def build_chord_table():
+    """
+    function that creates the 4096 entries table: pitch class set -> chord type class name (or None)
+    """
+    table = [None] * 4096
+    for name, intervals in CHORD_TEMPLATES:
+        for root in range(12):
+            mask = pitch_class_mask(root + interval for interval in intervals)
+            if table[mask] is None:
+                table[mask] = name
+    return table
+
+
+CHORD_TABLE = build_chord_table()
+
+
+def classify_chords(chords, previous_mask=None):
+    """
+    function that classifies the chords of a meter, chords are (onset in quarter notes, midi values)
+
+    previous_mask is the pitch class set of the last chord before the meter, a chord is a change if its pitch class
+    set is different from the chord before it.
+    returns (chord type names in order of appearance, number of changes, pitch class set of the last chord)
+    """
+    chord_types = []
+    changes = 0
+    for onset, midis in sorted(chords):
+        mask = pitch_class_mask(midis)
+        name = CHORD_TABLE[mask]
+        if name and name not in chord_types:
+            chord_types.append(name)
+        if mask != previous_mask:
+            changes += 1
+        previous_mask = mask
+    return chord_types, changes, previous_mask
+
+
+def chord_change_rate(changes):
+    """
+    function that finds the chord change rate class of a meter from its number of chord changes:
+    no change is slow, 1 or 2 (about one per meter) is medium and more (about one per beat) is fast
+    """
+    if changes == 0:
+        return 'SlowChordChangeRate'
+    if changes <= 2:
+        return 'MediumChordChangeRate'
+    return 'FastChordChangeRate'
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+# per-meter key detection: the pitch class histograms of a sliding window of meters are correlated with the
+# 24 Krumhansl-Schmuckler key profiles in one matrix product.
+# a key is an index: 0-11 are the major keys and 12-23 the minor keys, key % 12 is the tonic pitch class
+
+MODE_NAMES = ['Major', 'Minor']
+
+# Krumhansl-Kessler key profiles (the ones music21 KrumhanslSchmuckler uses)
+MAJOR_PROFILE = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+MINOR_PROFILE = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+
+
+def key_profiles():
+    """
+    function that creates the 24 x 12 matrix of the key profiles, centered and normalized so that a dot product
+    with a centered histogram is proportional to their correlation
+    """
+    profiles = np.array([np.roll(MAJOR_PROFILE, tonic) for tonic in range(12)] +
+                        [np.roll(MINOR_PROFILE, tonic) for tonic in range(12)])
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    return profiles / np.linalg.norm(profiles, axis=1, keepdims=True)
+
+
+KEY_PROFILES = key_profiles()
+
+
+def window_histograms(histograms, window):
+    """
+    function that sums the histograms of the `window` meters around every meter (with cumulative sums)
+    """
+    n = len(histograms)
+    cumulative = np.vstack([np.zeros((1, 12)), np.cumsum(histograms, axis=0)])
+    starts = np.clip(np.arange(n) - (window - 1) // 2, 0, n)
+    ends = np.clip(starts + window, 0, n)
+    return cumulative[ends] - cumulative[starts]
+
+
+def meter_keys(histograms, window=4):
+    """
+    function that finds the key of every meter from its pitch class histogram (meters x 12, durations of the
+    pitch classes) and the histograms of the meters around it
+
+    meters whose window has no notes keep the key of the previous meter (or of the next one at the start),
+    returns an array of key indices, -1 for every meter if the piece has no notes
+    """
+    histograms = np.asarray(histograms, dtype=float).reshape(-1, 12)
+    if not len(histograms):
+        return np.zeros(0, dtype=int)
+    windows = window_histograms(histograms, max(window, 1))
+    centered = windows - windows.mean(axis=1, keepdims=True)
+    keys = (centered @ KEY_PROFILES.T).argmax(axis=1)
+    found = np.linalg.norm(centered, axis=1) > 0
+    if not found.any():
+        return np.full(len(keys), -1)
+
+    # fill the meters without a key forward, then the meters before the first key backward
+    positions = np.maximum.accumulate(np.where(found, np.arange(len(keys)), -1))
+    positions[positions < 0] = np.argmax(found)
+    return keys[positions]
+
+
+def histogram_key(pitch_classes):
+    """
+    function that finds the key of one pitch class histogram (e.g. of a whole piece), -1 if it has no notes
+    """
+    return int(meter_keys([pitch_classes], window=1)[0])
+
+
+def mode_name(key):
+    """
+    function that returns the name of the mode class of a key
+    """
+    return MODE_NAMES[key // 12] + 'Mode'
+
+
+def fifths(key):
+    """
+    function that finds the position of the key signature of a key in the circle of fifths
+    (a minor key has the signature of its relative major)
+    """
+    tonic = key % 12
+    if key >= 12:
+        tonic = (tonic + 3) % 12
+    return tonic * 7 % 12
+
+
+def modulation_name(previous, key):
+    """
+    function that returns the name of the tonal modulation class of a change of key:
+    expected for a move of up to 1 step in the circle of fifths, ambiguous for 2 steps and unexpected for more
+    """
+    steps = (fifths(key) - fifths(previous)) % 12
+    steps = min(steps, 12 - steps)
+    if steps <= 1:
+        expectancy = 'Expected'
+    elif steps == 2:
+        expectancy = 'Ambiguous'
+    else:
+        expectancy = 'Unexpected'
+    return expectancy + MODE_NAMES[previous // 12] + 'To' + MODE_NAMES[key // 12]
@@ -0,0 +1,102 @@
+from array import array
+from collections import namedtuple
+import numpy as np
+
+
+# melody features of all the meters of a piece at once: the melody notes are kept in flat arrays
+# (int16 midi values, octaves and duration types) and direction, average pitch, pitch range and intervals
+# are computed for every meter with numpy instead of one pair of music21 notes at a time.
+# the rules are the ones of parseXML.find_melody_direction_pitch_and_pitch_range and find_intervals
+
+# interval classes by semitones (0 - 12), bigger intervals are reduced to their class in the octave
+INTERVAL_NAMES = ['UnisonInterval', 'MinorSecondInterval', 'MajorSecondInterval', 'MinorThirdInterval',
+                  'MajorThirdInterval', 'PerfectFourthInterval', 'AugmentedFourthInterval', 'PerfectFifthInterval',
+                  'MinorSixthInterval', 'MajorSixthInterval', 'MinorSeventhInterval', 'MajorSeventhInterval',
+                  'OctaveInterval']
+
+# results of MelodyArrays.features:
+#   counts: number of notes of every meter
+#   direction: sum of the directions (+1 up, -1 down, 0 same) of the consecutive notes of every meter
+#   average_pitch: average midi value of every meter (nan without notes)
+#   pitch_range: highest - lowest midi value of every meter (-1 without notes)
+#   pair_meter: meter of every pair of consecutive notes (the meter of the second note)
+#   boundary: True if the first note of the pair is the last note of the previous meter
+#   intervals: interval class (index of INTERVAL_NAMES) of every pair
+#   pair_durations: duration code of every pair (the longest duration type of the 2 notes)
+#   duration_names: duration type of every duration code
+MelodyFeatures = namedtuple('MelodyFeatures', ['counts', 'direction', 'average_pitch', 'pitch_range', 'pair_meter',
+                                               'boundary', 'intervals', 'pair_durations', 'duration_names'])
+
+
+def note_key(note):
+    """
+    function that finds the key that orders notes like higher_lower: octave first, then midi value
+    """
+    return note.octave * 128 + note.pitch.midi
+
+
+def interval_codes(midi1, midi2):
+    """
+    function that finds the interval class of 2 midi values (or 2 arrays of midi values)
+    """
+    semitones = np.abs(np.asarray(midi1, dtype=np.int16) - np.asarray(midi2, dtype=np.int16))
+    return np.where(semitones > 12, semitones % 12, semitones)
+
+
+class MelodyArrays:
+    """
+    the melody notes of the meters of a piece, one add_meter call per meter in order
+    """
+
+    def __init__(self):
+        self.midi = array('h')
+        self.octaves = array('b')
+        self.types = []  # duration type of every note
+        self.counts = array('l')
+
+    def add_meter(self, notes):
+        """
+        function that adds the melody notes of the next meter (music21 notes or stream_xml notes, or None)
+        """
+        notes = notes or []
+        for note in notes:
+            self.midi.append(note.pitch.midi)
+            self.octaves.append(note.octave)
+            self.types.append(note.duration.type)
+        self.counts.append(len(notes))
+
+    def features(self):
+        """
+        function that computes the melody features of all the meters
+        """
+        counts = np.array(self.counts, dtype=np.int64)
+        midi = np.array(self.midi, dtype=np.int16)
+        keys = np.array(self.octaves, dtype=np.int32) * 128 + midi
+        n_meters = len(counts)
+        meter_of_note = np.repeat(np.arange(n_meters), counts)
+
+        # consecutive notes make a pair in the same meter, or across 2 meters if the previous meter has notes
+        first = np.flatnonzero(meter_of_note[1:] - meter_of_note[:-1] <= 1)
+        second = first + 1
+        pair_meter = meter_of_note[second]
+        boundary = meter_of_note[first] != pair_meter
+
+        directions = np.sign(keys[second] - keys[first])
+        direction = np.bincount(pair_meter, weights=directions, minlength=n_meters).astype(np.int64)
+
+        sums = np.bincount(meter_of_note, weights=midi, minlength=n_meters)
+        average_pitch = np.divide(sums, counts, out=np.full(n_meters, np.nan), where=counts > 0)
+
+        pitch_range = np.full(n_meters, -1, dtype=np.int64)
+        has_notes = counts > 0
+        if has_notes.any():
+            starts = (np.cumsum(counts) - counts)[has_notes]
+            pitch_range[has_notes] = np.maximum.reduceat(midi, starts) - np.minimum.reduceat(midi, starts)
+
+        # the codes are in the order of the duration names (like longest_duration compares them)
+        duration_names, codes = np.unique(np.array(self.types, dtype=str), return_inverse=True)
+        pair_durations = np.maximum(codes[first], codes[second])
+
+        return MelodyFeatures(counts, direction, average_pitch, pitch_range, pair_meter, boundary,
+                              interval_codes(midi[first], midi[second]), pair_durations,
+                              [str(name) for name in duration_names])
@@ -0,0 +1,92 @@
+import numpy as np
+from owlready2 import And, Restriction, ConstrainedDatatype
+import MusicEmotionOntology as meo
+
+
+# classification of the meters into the valence and arousal meter classes (VeryPositiveValenceMeter,
+# MediumHighArousalMeter, ...) without the reasoner: the ranges of the classes are read once from their
+# equivalent_to restrictions (Meter & (hasValenceValue >= 0.25) & (hasValenceValue < 3.9)), the values of all the
+# meters are binned with numpy.digitize and the memberships are asserted with one bulk insert.
+# a range is half open [low, high), so an exclusive minimum or an inclusive maximum is moved to the next float
+
+def restriction_range(restrictions, prop):
+    """
+    function that finds the [low, high) range of the values of a property in a list of restrictions,
+    returns None if a restriction is not a datatype range of the property
+    """
+    low, high = -np.inf, np.inf
+    for restriction in restrictions:
+        if not (isinstance(restriction, Restriction) and restriction.property is prop
+                and isinstance(restriction.value, ConstrainedDatatype)):
+            return None
+        datatype = restriction.value
+        if getattr(datatype, 'min_inclusive', None) is not None:
+            low = max(low, datatype.min_inclusive)
+        if getattr(datatype, 'min_exclusive', None) is not None:
+            low = max(low, np.nextafter(datatype.min_exclusive, np.inf))
+        if getattr(datatype, 'max_exclusive', None) is not None:
+            high = min(high, datatype.max_exclusive)
+        if getattr(datatype, 'max_inclusive', None) is not None:
+            high = min(high, np.nextafter(datatype.max_inclusive, np.inf))
+    return low, high
+
+
+def class_ranges(prop):
+    """
+    function that finds the meter classes defined by a range of a data property: [(class, low, high)]
+    """
+    ranges = []
+    for cls in meo.Meter.descendants():
+        for definition in cls.equivalent_to:
+            if isinstance(definition, And) and meo.Meter in definition.Classes:
+                restrictions = [c for c in definition.Classes if c is not meo.Meter]
+                found = restriction_range(restrictions, prop) if restrictions else None
+                if found:
+                    ranges.append((cls, found[0], found[1]))
+    return sorted(ranges, key=lambda r: r[1])
+
+
+class MeterClassifier:
+    """
+    bins the values of a data property into the meter classes defined by its ranges,
+    the values between the ranges (e.g. valence 0.24 - 0.25) have no class
+    """
+
+    def __init__(self, prop):
+        self.prop = prop
+        ranges = class_ranges(prop)
+        bounds = [bound for _, low, high in ranges for bound in (low, high)]
+        self.edges = np.unique([bound for bound in bounds if np.isfinite(bound)])
+        # bin i is [edges[i - 1], edges[i]), the first and the last bins are unbounded
+        lows = np.concatenate([[-np.inf], self.edges])
+        highs = np.concatenate([self.edges, [np.inf]])
+        self.bin_classes = [None] * len(lows)
+        for i, (bin_low, bin_high) in enumerate(zip(lows, highs)):
+            for cls, low, high in ranges:
+                if low <= bin_low and bin_high <= high:
+                    self.bin_classes[i] = cls
+                    break
+
+    def classify(self, values):
+        """
+        function that returns the meter class (or None) of every value
+        """
+        bins = np.digitize(np.asarray(list(values), dtype=float), self.edges)
+        return [self.bin_classes[i] for i in bins]
+
+
+VALENCE_CLASSIFIER = MeterClassifier(meo.hasValenceValue)
+AROUSAL_CLASSIFIER = MeterClassifier(meo.hasArousalValue)
+
+
+def classify_meters(meter_list, valence, arousal):
+    """
+    function that asserts the valence and arousal meter classes of scored meters (lists of values in the order of
+    the meters), returns the lists of the valence and of the arousal meter classes of the meters
+    """
+    valence_classes = VALENCE_CLASSIFIER.classify(valence)
+    arousal_classes = AROUSAL_CLASSIFIER.classify(arousal)
+    pairs = [(meter, cls) for meter, classes in zip(meter_list, zip(valence_classes, arousal_classes))
+             for cls in classes if cls is not None]
+    meo.bulk_add_types(pairs)
+    return valence_classes, arousal_classes
@@ -0,0 +1,85 @@
+from array import array
+import MusicEmotionOntology as meo
+
+
+# compact features of a meter, used during extraction instead of ontology individuals.
+# the features are integer codes in arrays, they are written to the ontology later in one pass (parseXML.add_track)
+
+# object properties that link a meter with its features
+PROPERTY_NAMES = ['hasDynamicShape', 'hasRhythmChange', 'hasDynamics', 'hasArticulation', 'hasMelodyDirection',
+                  'hasAveragePitch', 'hasPitchRange', 'hasMusicalFeature', 'hasMode']
+PROPERTY_CODES = {name: code for code, name in enumerate(PROPERTY_NAMES)}
+
+# names of the musical feature classes, sorted so that every process has the same codes
+FEATURE_NAMES = sorted(cls.name for cls in meo.onto.classes() if issubclass(cls, meo.MusicalFeature))
+FEATURE_CODES = {name: code for code, name in enumerate(FEATURE_NAMES)}
+
+# interval durations, None is an interval without duration and every other type has the same weight as 'other'
+DURATION_NAMES = [None, 'whole', 'half', 'quarter', 'eighth', '16th', '32nd', 'other']
+DURATION_CODES = {name: code for code, name in enumerate(DURATION_NAMES)}
+
+
+class MeterFeatures:
+    """
+    the musical features of a meter: (object property, class name) pairs and the intervals with their durations,
+    iterating gives (object property, class name, duration) like the features lists of extract_track
+    """
+    __slots__ = ('number', 'properties', 'features', 'intervals', 'durations')
+
+    def __init__(self, number):
+        self.number = number
+        self.properties = array('B')
+        self.features = array('H')
+        self.intervals = array('H')
+        self.durations = array('B')
+
+    def add(self, prop, class_name):
+        self.properties.append(PROPERTY_CODES[prop])
+        self.features.append(FEATURE_CODES[class_name])
+
+    def add_interval(self, class_name, duration=None):
+        self.intervals.append(FEATURE_CODES[class_name])
+        self.durations.append(DURATION_CODES.get(duration, DURATION_CODES['other']))
+
+    def mode(self):
+        """
+        function that returns the class name of the meter's own mode (found by the key detection), or None
+        """
+        code = PROPERTY_CODES['hasMode']
+        for prop, feature in zip(self.properties, self.features):
+            if prop == code:
+                return FEATURE_NAMES[feature]
+        return None
+
+    def interval_counts(self):
+        """
+        function that counts the (interval, duration) pairs of the meter: {(interval class name, duration): count}
+        """
+        counts = {}
+        for interval, duration in zip(self.intervals, self.durations):
+            key = (FEATURE_NAMES[interval], DURATION_NAMES[duration])
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def __len__(self):
+        return len(self.features) + len(self.intervals)
+
+    def feature_items(self):
+        """
+        generator that yields the (object property, class name) pairs of the features that are not intervals
+        """
+        for prop, feature in zip(self.properties, self.features):
+            yield PROPERTY_NAMES[prop], FEATURE_NAMES[feature]
+
+    def __iter__(self):
+        for prop, class_name in self.feature_items():
+            yield prop, class_name, None
+        for interval, duration in zip(self.intervals, self.durations):
+            yield 'hasMusicalFeature', FEATURE_NAMES[interval], DURATION_NAMES[duration]
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
@@ -0,0 +1,262 @@
+import heapq
+from array import array
+from collections import namedtuple
+import numpy as np
+import stream_xml
+
+
+# reading midi files without music21: the events of the tracks (midi_file_events), the notes, tempos and time
+# signatures of a file in arrays (read_midi_arrays) and one stream_xml.MeasureRecord per measure
+# (iter_measure_records), so that midi files go through the same per meter pipeline as the xml files.
+# an event: (time in beats, kind, values)
+#   ('note_on', (channel, midi, velocity)), ('note_off', (channel, midi)), ('tempo', (bpm,)),
+#   ('time_signature', (beats, beat type))
+
+# change this when the records change, cached records of older versions are not used
+EXTRACTOR_VERSION = 1
+
+MIDI_EXTENSIONS = ('.mid', '.midi')
+PERCUSSION_CHANNEL = 9  # notes of the percussion channel have no pitch, they are skipped
+
+
+def read_variable_length(data, pos):
+    """
+    function that reads a variable length quantity of a midi file, returns (value, next position)
+    """
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def read_chunks(data):
+    """
+    generator that yields the (type, bytes) chunks of a midi file
+    """
+    pos = 0
+    while pos + 8 <= len(data):
+        length = int.from_bytes(data[pos + 4:pos + 8], 'big')
+        yield data[pos:pos + 4], data[pos + 8:pos + 8 + length]
+        pos += 8 + length
+
+
+def read_track_events(track):
+    """
+    generator that yields the (tick, kind, values) events of a midi track, other events are skipped
+    """
+    tick = 0
+    pos = 0
+    status = None
+    while pos < len(track):
+        delta, pos = read_variable_length(track, pos)
+        tick += delta
+        byte = track[pos]
+        if byte == 0xFF:  # meta event
+            meta_type = track[pos + 1]
+            length, pos = read_variable_length(track, pos + 2)
+            payload = track[pos:pos + length]
+            pos += length
+            if meta_type == 0x51:
+                yield tick, 'tempo', (60000000 / int.from_bytes(payload, 'big'),)
+            elif meta_type == 0x58:
+                yield tick, 'time_signature', (payload[0], 2 ** payload[1])
+            elif meta_type == 0x2F:  # end of track
+                return
+            continue
+        if byte in (0xF0, 0xF7):  # system exclusive
+            length, pos = read_variable_length(track, pos + 1)
+            pos += length
+            continue
+        if byte & 0x80:
+            status = byte
+            pos += 1
+        # else the status of the previous event is used (running status)
+        kind = status & 0xF0
+        channel = status & 0x0F
+        if kind in (0xC0, 0xD0):  # program change, channel pressure: 1 data byte
+            pos += 1
+            continue
+        data1, data2 = track[pos], track[pos + 1]
+        pos += 2
+        if kind == 0x90 and data2 > 0:
+            yield tick, 'note_on', (channel, data1, data2)
+        elif kind == 0x80 or kind == 0x90:  # note on with velocity 0 is a note off
+            yield tick, 'note_off', (channel, data1)
+
+
+def read_midi_file(path):
+    """
+    function that reads a midi file, returns (ticks per beat, list of the event generators of the tracks)
+    """
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    chunks = read_chunks(data)
+    chunk_type, header = next(chunks)
+    if chunk_type != b'MThd':
+        raise ValueError(f"{path} is not a midi file")
+    ticks_per_beat = int.from_bytes(header[4:6], 'big')
+    if ticks_per_beat & 0x8000:
+        raise ValueError("midi files with SMPTE time are not supported")
+    tracks = [read_track_events(chunk) for chunk_type, chunk in chunks if chunk_type == b'MTrk']
+    return ticks_per_beat, tracks
+
+
+def midi_file_events(path):
+    """
+    generator that yields the events of a midi file in time order (the tracks are merged)
+    """
+    ticks_per_beat, tracks = read_midi_file(path)
+    for tick, kind, values in heapq.merge(*tracks, key=lambda event: event[0]):
+        yield tick / ticks_per_beat, kind, values
+
+
+def velocity_to_dynamic(velocity):
+    """
+    function that finds the dynamic value (e.g. 'mf') of a midi velocity
+    """
+    if velocity < 40:
+        return 'pp'
+    elif velocity < 56:
+        return 'p'
+    elif velocity < 72:
+        return 'mp'
+    elif velocity < 88:
+        return 'mf'
+    elif velocity < 104:
+        return 'f'
+    return 'ff'
+
+
+def measure_record(number, start, end, notes, time_signature, tempos):
+    """
+    function that creates the record of a measure from its [onset, midi, velocity, end] notes:
+    the melody is the highest note of every onset, notes that start together are a chord
+    """
+    onsets = {}  # onset -> notes that start at the same time
+    pitch_classes = [0.0] * 12
+    dynamics = []
+    for onset, midi, velocity, note_end in notes:
+        length = min(note_end if note_end is not None else end, end) - onset
+        onsets.setdefault(round(onset - start, 3), []).append((midi, length))
+        pitch_classes[midi % 12] += length
+        dynamics.append(velocity)
+
+    melody = []
+    chords = []
+    for onset in sorted(onsets):
+        group = onsets[onset]
+        midi, length = max(group)
+        melody.append(stream_xml.StreamNote(midi, midi // 12 - 1, stream_xml.quarter_length_type(length)))
+        if len(group) > 1:
+            chords.append((onset, tuple(sorted(m for m, _ in group))))
+
+    # the dynamic of the measure is the one of its average velocity
+    if dynamics:
+        dynamics = [velocity_to_dynamic(sum(dynamics) / len(dynamics))]
+    rests = [] if melody else [stream_xml.quarter_length_type(end - start)]
+    return stream_xml.MeasureRecord(str(number), melody, chords, rests, dynamics, [], [], time_signature, tempos,
+                                    pitch_classes)
+
+
+# notes, tempos and time signatures of a midi file:
+#   onsets, ends: ticks of the note on and note off of every note (sorted by onset and midi value)
+#   midi, velocities: midi value and velocity of every note
+#   tempo_ticks, tempos: tick and bpm of every tempo event
+#   signature_ticks, signatures: tick and (beats, beat type) of every time signature event
+MidiArrays = namedtuple('MidiArrays', ['ticks_per_beat', 'onsets', 'ends', 'midi', 'velocities', 'tempo_ticks',
+                                       'tempos', 'signature_ticks', 'signatures'])
+
+
+def is_midi_file(path):
+    return str(path).lower().endswith(MIDI_EXTENSIONS)
+
+
+def read_midi_arrays(path):
+    """
+    function that reads the note on/off, tempo and time signature events of a midi file into arrays
+    """
+    ticks_per_beat, tracks = read_midi_file(path)
+    onsets = array('q')
+    ends = array('q')
+    midi = array('h')
+    velocities = array('B')
+    tempo_ticks = array('q')
+    tempos = array('d')
+    signature_ticks = array('q')
+    signatures = []
+    sounding = {}  # (channel, midi) -> indices of the notes that wait for their note off, oldest first
+    last_tick = 0
+    for tick, kind, values in heapq.merge(*tracks, key=lambda event: event[0]):
+        last_tick = tick
+        if kind == 'note_on' and values[0] != PERCUSSION_CHANNEL:
+            sounding.setdefault(values[:2], []).append(len(onsets))
+            onsets.append(tick)
+            ends.append(-1)
+            midi.append(values[1])
+            velocities.append(values[2])
+        elif kind == 'note_off' and sounding.get(values):
+            ends[sounding[values].pop(0)] = tick
+        elif kind == 'tempo':
+            tempo_ticks.append(tick)
+            tempos.append(values[0])
+        elif kind == 'time_signature':
+            signature_ticks.append(tick)
+            signatures.append(values)
+
+    ends = np.array(ends, dtype=np.int64)
+    ends[ends < 0] = last_tick  # notes without a note off end with the file
+    onsets = np.array(onsets, dtype=np.int64)
+    midi = np.array(midi, dtype=np.int16)
+    order = np.lexsort((midi, onsets))
+    return MidiArrays(ticks_per_beat, onsets[order], ends[order], midi[order],
+                      np.array(velocities, dtype=np.uint8)[order], np.array(tempo_ticks, dtype=np.int64),
+                      np.array(tempos), np.array(signature_ticks, dtype=np.int64), signatures)
+
+
+def measure_starts(arrays):
+    """
+    function that finds the tick of the start of every measure and the time signature that starts with it,
+    a time signature in the middle of a measure starts with the next one (like midi_stream.MeasureSegmenter)
+    """
+    last_tick = max(int(arrays.ends.max()) if len(arrays.ends) else 0, 1)
+    starts = []
+    signatures = []
+    beats, beat_type = 4, 4
+    next_signature = 0
+    tick = 0
+    while tick < last_tick:
+        signature = None
+        while next_signature < len(arrays.signatures) and arrays.signature_ticks[next_signature] <= tick:
+            beats, beat_type = signature = arrays.signatures[next_signature]
+            next_signature += 1
+        starts.append(tick)
+        signatures.append(signature)
+        tick += max(int(round(beats * 4 / beat_type * arrays.ticks_per_beat)), 1)
+    starts.append(tick)  # the end of the last measure
+    return np.array(starts, dtype=np.int64), signatures
+
+
+def iter_measure_records(path):
+    """
+    generator that yields a stream_xml.MeasureRecord for every measure of a midi file
+    """
+    arrays = read_midi_arrays(path)
+    starts, signatures = measure_starts(arrays)
+    # the measure of every note and every tempo, and the first note of every measure
+    note_measures = np.searchsorted(starts, arrays.onsets, side='right') - 1
+    tempo_measures = np.searchsorted(starts, arrays.tempo_ticks, side='right') - 1
+    first_notes = np.searchsorted(note_measures, np.arange(len(starts)))
+
+    ticks_per_beat = arrays.ticks_per_beat
+    for m in range(len(starts) - 1):
+        notes = [[onset / ticks_per_beat, pitch, velocity, end / ticks_per_beat]
+                 for onset, pitch, velocity, end in zip(arrays.onsets[first_notes[m]:first_notes[m + 1]].tolist(),
+                                                        arrays.midi[first_notes[m]:first_notes[m + 1]].tolist(),
+                                                        arrays.velocities[first_notes[m]:first_notes[m + 1]].tolist(),
+                                                        arrays.ends[first_notes[m]:first_notes[m + 1]].tolist())]
+        tempos = arrays.tempos[tempo_measures == m].tolist()
+        yield measure_record(m + 1, float(starts[m]) / ticks_per_beat, float(starts[m + 1]) / ticks_per_beat, notes,
+                             signatures[m], tempos)
@@ -0,0 +1,222 @@
+import sys
+import time
+from collections import deque
+import numpy as np
+import MusicEmotionOntology as meo
+import key_finder
+import chord_table
+import melody_kernel
+from meter_features import MeterFeatures
+from score_engine import ScoringEngine
+from standardizer import ValenceArousalStats
+from midi_file import midi_file_events, measure_record, PERCUSSION_CHANNEL
+from parseXML import (dynamic_from_value, tempo_from_bpm, tempo_arousal, add_melody_features, duration_weight,
+                      EMOTION_WEIGHTS)
+
+
+# real time valence/arousal from a stream of midi events (a .mid file or a midi input port): the events are
+# cut into measures as they arrive and every measure is scored as soon as it's complete, with the feature
+# mappers of parseXML and the scoring engine (no ontology individuals and no reasoner).
+# the time of an event is in beats (quarter notes), so measures are found from the time signature.
+# the events are the ones of midi_file.midi_file_events, and ('clock', ()) when only the time moves
+# (to close measures during silence)
+
+DEFAULT_BPM = 120  # the tempo of a midi file without tempo events
+
+
+def midi_port_events(name, bpm=DEFAULT_BPM, poll_interval=0.01):
+    """
+    generator that yields the events of a midi input port (e.g. a virtual port that replays a .mid),
+    the time in beats is found from the time since the start and the bpm.
+    when no message arrives a 'clock' event is yielded every poll_interval seconds
+    """
+    import mido  # only needed for ports
+
+    start = time.monotonic()
+    with mido.open_input(name) as port:
+        while True:
+            message = port.poll()
+            beat = (time.monotonic() - start) * bpm / 60
+            if message is None:
+                yield beat, 'clock', ()
+                time.sleep(poll_interval)
+            elif message.type == 'note_on' and message.velocity > 0:
+                yield beat, 'note_on', (message.channel, message.note, message.velocity)
+            elif message.type in ('note_on', 'note_off'):
+                yield beat, 'note_off', (message.channel, message.note)
+
+
+class MeasureSegmenter:
+    """
+    cuts a stream of midi events into measures, feed returns the measures that the time of an event completes
+    as stream_xml.MeasureRecord (the same records as the streaming xml extractor)
+    """
+
+    def __init__(self, bpm=DEFAULT_BPM):
+        self.beats = 4
+        self.beat_type = 4
+        self.time_signature = None  # new time signature of the current measure
+        self.next_time_signature = None  # time signature that starts with the next measure
+        self.bpm = bpm
+        self.tempos = []
+        self.number = 1
+        self.start = 0.0
+        self.notes = []  # [onset, midi, velocity, end] of the notes that start in the current measure
+        self.sounding = {}  # (channel, midi) -> note
+
+    def measure_length(self):
+        return self.beats * 4 / self.beat_type
+
+    def feed(self, beat, kind, values):
+        completed = []
+        while beat >= self.start + self.measure_length():
+            completed.append(self.close())
+
+        if kind in ('note_on', 'note_off') and values[0] == PERCUSSION_CHANNEL:
+            return completed
+        if kind == 'note_on':
+            note = [beat, values[1], values[2], None]
+            self.notes.append(note)
+            self.sounding[(values[0], values[1])] = note
+        elif kind == 'note_off':
+            note = self.sounding.pop(values, None)
+            if note is not None:
+                note[3] = beat
+        elif kind == 'tempo':
+            self.bpm = values[0]
+            self.tempos.append(values[0])
+        elif kind == 'time_signature':
+            # a time signature changes the current measure if it's at its start, else the next one
+            if beat - self.start < 1e-6:
+                self.beats, self.beat_type = values
+                self.time_signature = values
+            else:
+                self.next_time_signature = values
+        return completed
+
+    def close(self):
+        """
+        function that completes the current measure, notes that still sound end at the end of the measure
+        """
+        end = self.start + self.measure_length()
+        record = measure_record(self.number, self.start, end, self.notes, self.time_signature, self.tempos)
+        self.number += 1
+        self.start = end
+        self.notes = []
+        self.tempos = []
+        self.time_signature = None
+        if self.next_time_signature:
+            self.beats, self.beat_type = self.next_time_signature
+            self.time_signature = self.next_time_signature
+            self.next_time_signature = None
+        return record
+
+
+class LiveScorer:
+    """
+    scores the measures of a stream of midi events as soon as they are complete:
+    feed yields (measure number, tempo, valence, arousal, standarized valence, standarized arousal),
+    the values are standarized with the running statistics of the measures so far.
+    the mode of a measure is found from the key_window measures that end with it
+    """
+
+    def __init__(self, engine, bpm=DEFAULT_BPM, key_window=8):
+        self.engine = engine
+        self.segmenter = MeasureSegmenter(bpm)
+        self.histograms = deque(maxlen=max(key_window, 1))
+        self.last_note = None
+        self.last_chord = None
+        self.last_dynamic = None
+        self.stats = ValenceArousalStats()
+
+    def feed(self, beat, kind, values):
+        for record in self.segmenter.feed(beat, kind, values):
+            yield self.score(record)
+
+    def flush(self):
+        """
+        function that scores the last measure if it has notes (at the end of a file)
+        """
+        if self.segmenter.notes:
+            yield self.score(self.segmenter.close())
+
+    def meter_features(self, record):
+        """
+        function that finds the musical features of a measure record like extract_track
+        """
+        features = MeterFeatures(int(record.number))
+
+        dyns = [d for d in (dynamic_from_value(d) for d in record.dynamics) if d is not None]
+        if dyns:
+            for dyn in dyns:
+                features.add('hasDynamics', dyn.name)
+            self.last_dynamic = dyns[-1]
+        elif self.last_dynamic:
+            features.add('hasDynamics', self.last_dynamic.name)
+
+        if record.chords:
+            chord_types, changes, self.last_chord = chord_table.classify_chords(record.chords, self.last_chord)
+            for name in chord_types:
+                features.add('hasMusicalFeature', name)
+            features.add('hasMusicalFeature', chord_table.chord_change_rate(changes))
+
+        # the melody kernel with the last note of the previous measure as a meter before this one
+        melody = melody_kernel.MelodyArrays()
+        melody.add_meter([self.last_note] if self.last_note is not None else [])
+        melody.add_meter(record.notes)
+        add_melody_features([MeterFeatures(0), features], melody.features())
+        self.last_note = record.notes[-1] if record.notes else None
+
+        # the key of the last measures
+        self.histograms.append(record.pitch_classes)
+        key = key_finder.meter_keys([np.sum(self.histograms, axis=0)], 1)[0]
+        if key >= 0:
+            features.add('hasMode', key_finder.mode_name(key))
+        return features
+
+    def score(self, record):
+        features = self.meter_features(record)
+        counts = self.engine.encode([{'mode': None, 'meters': [features]}])
+        # the tempo class of the bpm (like get_tempo), the arousal change is found from the bpm
+        bpm = self.segmenter.bpm
+        tempo_class, _ = tempo_from_bpm(round(bpm))
+        valence, arousal = self.engine.score(counts, np.array([tempo_arousal(bpm)]))
+        valence, arousal = float(valence[0]), float(arousal[0])
+        self.stats.add(valence, arousal)
+        standarized_valence, standarized_arousal = self.stats.standardize([valence], [arousal])
+        return (int(record.number), tempo_class.name if tempo_class else None, valence, arousal,
+                standarized_valence[0], standarized_arousal[0])
+
+
+def score_events(events, engine, bpm=DEFAULT_BPM, key_window=8):
+    """
+    generator that yields the scores of the measures of a stream of events (LiveScorer.feed)
+    """
+    scorer = LiveScorer(engine, bpm, key_window)
+    for beat, kind, values in events:
+        yield from scorer.feed(beat, kind, values)
+    yield from scorer.flush()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calculate valence and arousal of every measure of a midi stream")
+    parser.add_argument("source", help="a .mid file, or the name of a midi input port with --port")
+    parser.add_argument("--port", action="store_true", help="read the events of a midi input port")
+    parser.add_argument("--bpm", type=float, default=DEFAULT_BPM,
+                        help="tempo of a port (and of a file without tempo events)")
+    parser.add_argument("--key-window", type=int, default=8,
+                        help="number of measures the mode of a measure is found from")
+    args = parser.parse_args()
+
+    if args.port:
+        events = midi_port_events(args.source, args.bpm)
+    else:
+        events = midi_file_events(args.source)
+    engine = ScoringEngine(meo.create_triggers_lookup(), EMOTION_WEIGHTS, duration_weight)
+
+    print("meter,tempo,valence,arousal,standarized_valence,standarized_arousal")
+    for scores in score_events(events, engine, args.bpm, args.key_window):
+        print(*scores, sep=",")
+        sys.stdout.flush()
@@ -1,12 +1,31 @@
-from owlready2 import sync_reasoner_pellet
+from owlready2 import sync_reasoner_pellet, destroy_entity, ThingClass
 import MusicEmotionOntology as meo
 import os
-from music21 import converter, analysis, tempo, dynamics
+import music21
+from music21 import converter, analysis, tempo, dynamics, freezeThaw
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from create_plot import plot_valence_arousal
+import stream_xml
+import midi_file
+from score_cache import ScoreCache, file_sha256
+from score_engine import ScoringEngine
+from meter_features import MeterFeatures
+from snapshot import open_snapshot
+from standardizer import Standardizer
+import key_finder
+import chord_table
+import melody_kernel
+import aggregates
+import meter_classes
+from transitions import TransitionIndex
 import numpy as np
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import csv
+import pickle
+from contextlib import contextmanager
 
 
 # create a graph and create instances of the relative Ontology classes of the musical features found in the file
@@ -50,28 +69,34 @@ def get_tempo(score):
 
     tempo_marks = score.recurse().getElementsByClass(tempo.MetronomeMark)
     if tempo_marks:
-        bpm = tempo_marks[0].number
-        if bpm is None:
-            return None, None
-        if bpm != 0:
-            if 20 <= bpm <= 40:
-                return meo.Grave, bpm
-            elif 40 < bpm <= 55:
-                return meo.LargoTempo, bpm
-            elif 55 < bpm <= 71:
-                return meo.Adagio, bpm
-            elif 71 < bpm <= 108:
-                return meo.Andante, bpm
-            elif 108 < bpm <= 120:
-                return meo.Moderato, bpm
-            elif 120 < bpm <= 156:
-                return meo.AllegroTempo, bpm
-            elif 156 < bpm <= 168:
-                return meo.Vivace, bpm
-            elif 168 < bpm <= 200:
-                return meo.PrestoTempo, bpm
-            else:
-                return meo.Prestissimo, bpm
+        return tempo_from_bpm(tempo_marks[0].number)
+    return None, None
+
+def tempo_from_bpm(bpm):
+    """
+    function that finds the tempo class of a bpm value
+    """
+    if bpm is None:
+        return None, None
+    if bpm != 0:
+        if 20 <= bpm <= 40:
+            return meo.Grave, bpm
+        elif 40 < bpm <= 55:
+            return meo.LargoTempo, bpm
+        elif 55 < bpm <= 71:
+            return meo.Adagio, bpm
+        elif 71 < bpm <= 108:
+            return meo.Andante, bpm
+        elif 108 < bpm <= 120:
+            return meo.Moderato, bpm
+        elif 120 < bpm <= 156:
+            return meo.AllegroTempo, bpm
+        elif 156 < bpm <= 168:
+            return meo.Vivace, bpm
+        elif 168 < bpm <= 200:
+            return meo.PrestoTempo, bpm
+        else:
+            return meo.Prestissimo, bpm
     return None, None
 
 def find_dynamic_shape_time_signature(file_path, target_measure_number):
@@ -82,43 +107,80 @@ def find_dynamic_shape_time_signature(file_path, target_measure_number):
     root = tree.getroot()
     measure_xpath = f'.//measure[@number="{target_measure_number}"]'
     target_measure = root.find(measure_xpath)
+    if target_measure is None:
+        return None, None, None
+    directions, time_signature = read_measure_directions(target_measure)
+    dynamic_shape, rhythm_change = map_directions(directions)
+    return dynamic_shape, rhythm_change, time_signature
+
+def read_measure_directions(target_measure):
+    """
+    function that reads the wedges and words directions (in score order) and the time signature of a measure element
+    """
+    directions = []  # list like: [('wedge', 'crescendo'), ('words', 'rit.'), ...]
+    time_signature = None
+    attributes_elem = target_measure.find('attributes')
+    if attributes_elem is not None:
+        time_elem = attributes_elem.find('time')
+        if time_elem is not None:
+            beats_per_measure = int(time_elem.find('beats').text)
+            beat_type = int(time_elem.find('beat-type').text)
+            time_signature = (beats_per_measure, beat_type)
+    # Iterate through directions within the measure
+    for direction in target_measure.findall('.//direction'):
+        # Check for direction-type element within the direction
+        direction_type = direction.find('./direction-type')
+        if direction_type is not None:
+            # Iterate through all wedge elements within direction-type
+            for wedge in direction_type.findall('./wedge'):
+                directions.append(('wedge', wedge.attrib.get('type', '')))
+            for words in direction_type.findall(
+                    './words'):  # to find words on the staff often related with rhythm change
+                directions.append(('words', words.text))
+    return directions, time_signature
+
+def map_directions(directions):
+    """
+    function that maps the wedges and words of a measure to its dynamic shape and rhythm change
+    """
     rhythm_change = None
     dynamic_shape = None
-    time_signature = None
-    if target_measure is not None:
-
-        attributes_elem = target_measure.find('attributes')
-        if attributes_elem is not None:
-            time_elem = attributes_elem.find('time')
-            if time_elem is not None:
-                beats_per_measure = int(time_elem.find('beats').text)
-                beat_type = int(time_elem.find('beat-type').text)
-                time_signature = (beats_per_measure, beat_type)
-        # Iterate through directions within the measure
-        for direction in target_measure.findall('.//direction'):
-            # Check for direction-type element within the direction
-            direction_type = direction.find('./direction-type')
-            if direction_type is not None:
-                # Iterate through all wedge elements within direction-type
-                for wedge in direction_type.findall('./wedge'):
-                    wedge_type = wedge.attrib.get('type', '')
-                    if wedge_type == "crescendo":
-                        dynamic_shape = meo.Crescendo
-                    elif wedge_type == "diminuendo":
-                        dynamic_shape = meo.Diminuendo
-                for words in direction_type.findall(
-                        './words'):  # to find words on the staff often related with rhythm change
-                    if words.text == 'accel' or words.text == 'accel.':
-                        rhythm_change = meo.Accelerando
-                    elif words.text == 'rit' or words.text == 'rit.':
-                        rhythm_change = meo.Ritardando
-                    elif words.text == 'riten.' or words.text == 'riten':
-                        rhythm_change = meo.Ritenuto
-                    elif words.text == 'cresc':
-                        dynamic_shape = meo.Crescendo
-                    elif words.text == 'dim':
-                        dynamic_shape = meo.Diminuendo
-    return dynamic_shape, rhythm_change, time_signature
+    for kind, text in directions:
+        if kind == 'wedge':
+            if text == "crescendo":
+                dynamic_shape = meo.Crescendo
+            elif text == "diminuendo":
+                dynamic_shape = meo.Diminuendo
+        elif text == 'accel' or text == 'accel.':
+            rhythm_change = meo.Accelerando
+        elif text == 'rit' or text == 'rit.':
+            rhythm_change = meo.Ritardando
+        elif text == 'riten.' or text == 'riten':
+            rhythm_change = meo.Ritenuto
+        elif text == 'cresc':
+            dynamic_shape = meo.Crescendo
+        elif text == 'dim':
+            dynamic_shape = meo.Diminuendo
+    return dynamic_shape, rhythm_change
+
+def build_measure_index(xml_file):
+    """
+    function that parses the file once and finds the number of measures, the first measure number
+    and an index: measure number -> (directions, time signature)
+    """
+    tree = ET.parse(xml_file)
+    root = tree.getroot()
+    measures = root.findall(".//measure")
+    measure_index = {}
+    for measure in measures:
+        number = measure.get("number")
+        # keep the first measure with this number, like root.find() does
+        if number not in measure_index:
+            measure_index[number] = read_measure_directions(measure)
+
+    first_measure_number = measures[0].get("number") if measures else None
+
+    return len(measures), int(first_measure_number), measure_index
 
 def find_articulations(note_element):
     # Check if the note element has articulations
@@ -126,17 +188,25 @@ def find_articulations(note_element):
     articulations = note_element.articulations
     if articulations is not None:
         for a in articulations:
-            art_name = a.__class__.__name__
-            if art_name == "Accent":
-                arts.append(meo.Accent)
-            elif art_name == "Staccato":
-                arts.append(meo.Staccato)
-            elif art_name == "Legato":
-                arts.append(meo.Legato)
-            elif art_name == "Tenuto":
-                arts.append(meo.Tenuto)
+            art = articulation_from_name(a.__class__.__name__)
+            if art is not None:
+                arts.append(art)
     return arts
 
+def articulation_from_name(art_name):
+    """
+    function that maps a music21 articulation class name to the articulation class
+    """
+    if art_name == "Accent":
+        return meo.Accent
+    elif art_name == "Staccato":
+        return meo.Staccato
+    elif art_name == "Legato":
+        return meo.Legato
+    elif art_name == "Tenuto":
+        return meo.Tenuto
+    return None
+
 
 def note_in_chord(chord_notes):
     """
@@ -157,36 +227,78 @@ def find_dynamics(element):
     function that finds the dynamics
     """
     if isinstance(element, dynamics.Dynamic):
-        dyn = element.value
-        if dyn == 'pp':
-            return meo.Pianissimo
-        elif dyn == 'p':
-            return meo.Piano
-        elif dyn == 'mp' or dyn == 'm':
-            return meo.MezzoPiano
-        elif dyn == 'mf':
-            return meo.MezzoForte
-        elif dyn == 'f':
-            return meo.Forte
-        elif dyn == 'ff':
-            return meo.Fortissimo
+        return dynamic_from_value(element.value)
+    return None
+
+def dynamic_from_value(dyn):
+    """
+    function that maps a dynamic value (e.g. 'mf') to the dynamics class
+    """
+    if dyn == 'pp':
+        return meo.Pianissimo
+    elif dyn == 'p':
+        return meo.Piano
+    elif dyn == 'mp' or dyn == 'm':
+        return meo.MezzoPiano
+    elif dyn == 'mf':
+        return meo.MezzoForte
+    elif dyn == 'f':
+        return meo.Forte
+    elif dyn == 'ff':
+        return meo.Fortissimo
     return None
 
-def get_measure_notes(file, score, i):
+def index_measures(part):
+    """
+    function that creates a dictionary of measure number -> measure of a part, so that a measure is found without
+    searching the part (like part.measure(i), the first measure with a number is kept)
+    """
+    measures = {}
+    for measure in part.getElementsByClass('Measure'):
+        measures.setdefault(measure.number, measure)
+    return measures
+
+def index_score_measures(score):
+    """
+    function that indexes the measures of every part of a score
+    """
+    return [index_measures(part) for part in score.parts]
+
+def iter_voice_elements(measure):
+    """
+    generator that yields (voice id, element) for every element of a measure in the order of measure.recurse(),
+    the voice id is the id of the Voice that contains the element or None if it's not in a voice
+    """
+    for element in measure:
+        if 'Voice' in element.classes:
+            yield element.id, element
+            for inner in element.recurse():
+                yield element.id, inner
+        elif element.isStream:
+            yield None, element
+            for inner in element.recurse():
+                yield None, inner
+        else:
+            yield None, element
+
+def get_measure_notes(file, score, i, part_measures=None):
     """
     Function that gets the score and a measure number and finds for the first part:
         - notes 
         - chords
         - dynamics
         - articulations
+    part_measures are the measures of the parts indexed by number (index_score_measures)
     """
+    if part_measures is None:
+        part_measures = index_score_measures(score)
 
     # find the first part
-    first_part = score.parts[0]
+    first_part = part_measures[0]
     # if there are 2 staves, we find the second part as well 
     second_part = None  
-    if len(score.parts) == 2:  
-        second_part = score.parts[1]
+    if len(part_measures) == 2:  
+        second_part = part_measures[1]
 
     # the function will find these:
     notes = []
@@ -196,26 +308,22 @@ def get_measure_notes(file, score, i):
     articulations = []
 
     # if there is no measure numbered i in the first part then we exit the function
-    if first_part.measure(i) is None:
+    if first_part.get(i) is None:
         return None, None, None, None, None
     
     # get measure's first part
-    measure_first_part = first_part.measure(i)
+    measure_first_part = first_part[i]
     # flag to know if the measure uses the voice feature   
     voice_found = False
 
-    # iterate through each element of the measure (first part)
-    for element in measure_first_part.recurse():  
+    # iterate through each element of the measure (first part), with the id of its voice
+    for voice, element in iter_voice_elements(measure_first_part):  
         if 'Voice' in element.classes:
             voice_found = True
         # if the element is a chord
         if 'Chord' in element.classes:  
             chords.append(element)
             # use this chord if the voice that it follows is '1' or if it does not follow any voice
-            parent_voice = element.getContextByClass('Voice')
-            voice = None
-            if parent_voice is not None:
-                voice = parent_voice.id
             if voice == '1' or voice == None or voice_found == False:
                 # find the melody note of the chord and append it to the notes list
                 n = note_in_chord(element)
@@ -232,11 +340,7 @@ def get_measure_notes(file, score, i):
         
         # find the notes only for the first voice, or if there are no voices
         if 'Note' in element.classes:  
-            parent_voice = element.getContextByClass('Voice')
-            voice = None
-            if parent_voice is not None:
-                voice = parent_voice.id
-            if voice == '1' or voice == "None" or voice_found == False:
+            if voice == '1' or voice == None or voice_found == False:
                 notes.append(element)  
             
             # find also if there are any artivculations    
@@ -247,7 +351,7 @@ def get_measure_notes(file, score, i):
 
     # if the measure has a second part, we use this to only find dynamics and articulations
     if second_part:  
-        measure_second_part = second_part.measure(i)  
+        measure_second_part = second_part.get(i)  
         if measure_second_part is not None:
             for element in measure_second_part.recurse():
                 if 'Note' in element.classes:  
@@ -261,18 +365,123 @@ def get_measure_notes(file, score, i):
 
     return notes, chords, rests, dynamics, articulations
 
+def iter_score_measures(xml_file, score, measures=None):
+    """
+    generator that yields the features of every measure of a music21 score:
+    (measure number, dynamic shape, rhythm change, time signature, notes, chords, rests, dynamics, articulations,
+     pitch classes), the chords are (onset in quarter notes, midi values)
+    measures is the result of build_measure_index (e.g. from the cache), the file is indexed if it's None
+    """
+    # count measures and index their directions with a single parse of the file
+    if measures is None:
+        measures = build_measure_index(xml_file)
+    num_of_measures, first_measure_num, measure_index = measures
+    # index the measures of every part once, instead of searching the parts for every measure
+    part_measures = index_score_measures(score)
+    for i in range(first_measure_num, num_of_measures + 1):
+        directions, time_signature = measure_index.get(str(i), ([], None))
+        dynamic_shape, rhythm_change = map_directions(directions)
+        # find notes, chords, rests, dynamics and articulations of a meter
+        notes, chords, rests, dyns, articulations = get_measure_notes(xml_file, score, i, part_measures)
+        # chords as (onset in quarter notes, midi values) like the streaming extractor
+        if chords:
+            chords = [(float(c.offset), tuple(p.midi for p in c.pitches)) for c in chords]
+        yield (i, dynamic_shape, rhythm_change, time_signature, notes, chords, rests, dyns, articulations,
+               measure_pitch_classes(part_measures, i))
+
+def measure_pitch_classes(part_measures, i):
+    """
+    function that finds the duration (in quarter notes) of every pitch class in measure i of all the parts
+    """
+    pitch_classes = [0.0] * 12
+    for measures in part_measures:
+        measure = measures.get(i)
+        if measure is None:
+            continue
+        for element in measure.recurse().notes:
+            for p in element.pitches:
+                pitch_classes[p.pitchClass] += float(element.quarterLength)
+    return pitch_classes
+
+def parse_score(xml_file, cache=None):
+    """
+    function that parses a xml file with music21 and indexes its measures (build_measure_index),
+    or loads the parsed score and the measure index from the cache, returns (score, measures)
+    """
+    if cache is None:
+        return converter.parse(xml_file), build_measure_index(xml_file)
+    key = cache.key(xml_file, "music21 " + music21.VERSION_STR + " measure index")
+    cached = cache.get(key)
+    if cached is not None:
+        thawer = freezeThaw.StreamThawer()
+        thawer.openStr(next(cached))
+        return thawer.stream, next(cached)
+    score = converter.parse(xml_file)
+    measures = build_measure_index(xml_file)
+    for _ in cache.put(key, [freezeThaw.StreamFreezer(score).writeStr(), measures]):
+        pass
+    return score, measures
+
+def read_measure_records(xml_file, cache=None):
+    """
+    function that returns an iterator over the measure records of the streaming extractor,
+    read from the cache if the file was already extracted, else written to the cache while they are extracted
+    """
+    # midi files are read without music21 too (midi_file.py)
+    if midi_file.is_midi_file(xml_file):
+        extractor, version = midi_file.iter_measure_records, "midi_file " + str(midi_file.EXTRACTOR_VERSION)
+    else:
+        extractor, version = stream_xml.iter_measures, "stream_xml " + str(stream_xml.EXTRACTOR_VERSION)
+    if cache is None:
+        return extractor(xml_file)
+    key = cache.key(xml_file, version)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    return cache.put(key, extractor(xml_file))
+
+def iter_stream_measures(xml_file, summary, cache=None):
+    """
+    generator that yields the same features as iter_score_measures, but reads the file with the streaming
+    extractor (no music21 score is built)
+
+    summary is filled with the pitch class histogram and the first bpm of the piece, to find mode and tempo at the end
+    """
+    summary['pitch_classes'] = [0.0] * 12
+    summary['bpm'] = None
+    first_measure_num = None
+    for position, record in enumerate(read_measure_records(xml_file, cache)):
+        if first_measure_num is None:
+            first_measure_num = int(record.number) if record.number.isdigit() else 1
+        summary['pitch_classes'] = [a + b for a, b in zip(summary['pitch_classes'], record.pitch_classes)]
+        if summary['bpm'] is None and record.tempos:
+            summary['bpm'] = round(record.tempos[0])
+        dynamic_shape, rhythm_change = map_directions(record.directions)
+        dyns = [dynamic_from_value(d) for d in record.dynamics]
+        dyns = [d for d in dyns if d is not None]
+        articulations = [articulation_from_name(a) for a in record.articulations]
+        articulations = [a for a in articulations if a is not None]
+        yield (first_measure_num + position, dynamic_shape, rhythm_change, record.time_signature, record.notes,
+               record.chords, record.rests, dyns, articulations, record.pitch_classes)
+
+def mode_from_pitch_classes(pitch_classes):
+    """
+    function that finds the mode of a pitch class histogram (used instead of get_mode when streaming)
+    """
+    key = key_finder.histogram_key(pitch_classes)
+    if key < 0:
+        return None
+    return getattr(meo, key_finder.mode_name(key))
+
 def higher_lower(note1, note2):
-    if note1.octave > note2.octave:
-        return -1
-    elif note1.octave < note2.octave:
+    # compare the octaves first and then the pitches (melody_kernel.note_key)
+    difference = melody_kernel.note_key(note2) - melody_kernel.note_key(note1)
+    if difference > 0:
         return +1
+    elif difference < 0:
+        return -1
     else:
-        if note1.pitch < note2.pitch:
-            return +1
-        elif note2.pitch < note1.pitch:
-            return -1
-        else:
-            return 0
+        return 0
 
 
 def note_to_midi(pitch):
@@ -280,92 +489,79 @@ def note_to_midi(pitch):
     return pitch.midi
 
 def find_melody_direction_pitch_and_pitch_range(meter_notes, last_note):
+    """
+    function that finds the direction, the average pitch and the pitch range of the notes of a meter,
+    the last note of the previous meter is used for the direction
+    """
+    melody = melody_kernel.MelodyArrays()
+    melody.add_meter([last_note] if last_note is not None else [])
+    melody.add_meter(meter_notes)
+    result = melody.features()
 
-    average_direction = 0
+    average_direction = int(result.direction[1])
     average_pitch = None  # integer that will be returned
-    avg_pitch = []  # list contain midi values for every note - middle C is 60
-    sum_pitch = 0  # used to find the average pitch
     pitch_range = None  # value that will be returned
-    for m_note in meter_notes:
-        avg_pitch.append(note_to_midi(m_note.pitch))  # calls function to create the midi values
-    if last_note is not None:
-        average_direction += higher_lower(last_note, meter_notes[0])  # compute last note in the direction
-    for i in range(0, len(meter_notes) - 1):
-        average_direction += higher_lower(meter_notes[i], meter_notes[i + 1])
-    if avg_pitch:
-        for p in avg_pitch:
-            sum_pitch += p
-        average_pitch = sum_pitch / len(avg_pitch)  # calculate the average pitch
-        highest_pitch = max(avg_pitch)
-        lowest_pitch = min(avg_pitch)
-        pitch_range = highest_pitch - lowest_pitch
+    if meter_notes:
+        average_pitch = float(result.average_pitch[1])  # calculate the average pitch
+        pitch_range = int(result.pitch_range[1])
 
     return average_direction, average_pitch, pitch_range
 
+# the interval classes in melody_kernel order (by semitones)
+INTERVAL_CLASSES = [getattr(meo, name) for name in melody_kernel.INTERVAL_NAMES]
+
 def calculate_interval(note1, note2):
     """
     function that takes 2 midi numbers as the notes and finds the interval between them
     """
-    # Define the interval patterns
-    interval_patterns = {
-        0: meo.UnisonInterval,
-        1: meo.MinorSecondInterval,
-        2: meo.MajorSecondInterval,
-        3: meo.MinorThirdInterval,
-        4: meo.MajorThirdInterval,
-        5: meo.PerfectFourthInterval,
-        6: meo.AugmentedFourthInterval,
-        7: meo.PerfectFifthInterval,
-        8: meo.MinorSixthInterval,
-        9: meo.MajorSixthInterval,
-        10: meo.MinorSeventhInterval,
-        11: meo.MajorSeventhInterval,
-        12: meo.OctaveInterval
-
-    }
-    interval = abs(note1 - note2)
-    if interval > 12:
-        return interval_patterns[interval % 12]
-    return interval_patterns[interval]
-
-def find_intervals(note1, note2):
+    return INTERVAL_CLASSES[melody_kernel.interval_codes(note1, note2)]
 
+def longest_duration(note1, note2):
+    """
+    function that finds the duration of the interval of 2 notes
+    """
     # find the duration (e.g. quarter)
     d1 = note1.duration.type  
     d2 = note2.duration.type
 
     # find the biggest duration of the 2 notes
     if d1 >= d2:  
-        interval_duration = d1  # this is now equal to the interval duration
-    else:
-        interval_duration = d2
+        return d1  # this is now equal to the interval duration
+    return d2
 
-    # caluclate the interval
+def find_intervals(note1, note2):
+
+    # caluclate the interval, its duration is longest_duration(note1, note2) and it's saved in the interval count
+    # of the meter (feature_triples), not in the interval class that all the meters share
     interval = calculate_interval(note_to_midi(note1.pitch), note_to_midi(note2.pitch)) 
     if interval != 'Invalid note':
-
-        # append the duration in the hasDuration property
-        interval.hasDuration = interval_duration  
-
         return interval
     return 'Invalid interval'
 
 def find_weight(interval):  
     """
-    function that takes an interval and assigns a weight based on its duration
+    function that takes an interval count and assigns a weight based on the duration of its interval
     """
     # print("mf in weight", mf.hasDuration)
-    if "whole" in interval.hasDuration:
+    return duration_weight(interval.hasDuration)
+
+def duration_weight(duration):
+    """
+    function that assigns a weight to a duration (e.g. 'quarter'), used for intervals
+    """
+    if duration is None:
+        return 1
+    if "whole" in duration:
         return 1.5
-    elif "half" in interval.hasDuration:
+    elif "half" in duration:
         return 1.25
-    elif "quarter" in interval.hasDuration:
+    elif "quarter" in duration:
         return 1
-    elif "eighth" in interval.hasDuration:
+    elif "eighth" in duration:
         return 0.3
-    elif "16th" in interval.hasDuration:
+    elif "16th" in duration:
         return 0.15
-    elif "32nd" in interval.hasDuration:
+    elif "32nd" in duration:
         return 0.075
     else:
         return 1
@@ -386,16 +582,26 @@ def bpm_to_arousal(bpm, min_bpm=30, max_bpm=220, min_arousal=-10, max_arousal=10
     # print(arousal)
     return arousal
 
-def calculate_tempo(tempo_cl):
+def tempo_arousal(bpm, min_bpm=30, max_bpm=220):
+    """
+    function that calculates the change in arousal of a bpm, a bpm out of the range of bpm_to_arousal
+    (a midi file can have any tempo) counts as the closest bound
+    """
+    return round(bpm_to_arousal(min(max(bpm, min_bpm), max_bpm), min_bpm, max_bpm), 3)
+
+def calculate_tempo(tempo_cl, bpm=None):
     """
     used to calculate how much we increase/ decrease the arousal arousal
+    with the bpm of the track, or the first bpm of the tempo class if the track has none
     """  
     print("tempo class", tempo_cl)
-    increase = round(bpm_to_arousal(tempo_cl.hasBPM[0]), 3)
+    if not bpm:
+        bpm = tempo_cl.hasBPM[0]
+    increase = tempo_arousal(bpm)
 
     return increase
 
-def calculate_valence_arousal(track):
+def calculate_valence_arousal(track, bpm=None):
         """
         function that calculates valence and arousal based on the musical features of a track/meter
         """
@@ -410,6 +616,12 @@ def calculate_valence_arousal(track):
                     tempo_class = mf.is_a[0]
                     continue
 
+            weight = 1
+            if isinstance(mf, meo.IntervalCount):
+                # find the weight depending on the duration of the interval and how many times it's in the meter
+                weight = find_weight(mf) * mf.hasIntervalCount[0]
+                mf = mf.hasInterval[0]
+
             # major Second Interval in major mode triggers different emotional stimuli
             if mode_flag == 'Major' and (mf == instances[meo.MajorSecondInterval] or mf == instances[meo.MinorSeventhInterval]):
                 mf.triggers = []
@@ -423,12 +635,6 @@ def calculate_valence_arousal(track):
                 mode_flag = 'Minor'
                 val_value -= 3
                 continue
-            if isinstance(mf, meo.Intervals):
-                # find the weight depending on the duration of he interval
-                weight = find_weight(mf)  
-            else:
-                weight = 1
-            
             # for tone we don't want tone to change dramatically the outcome
             if isinstance(mf, meo.Tone): 
                 weight = 0.5
@@ -457,210 +663,679 @@ def calculate_valence_arousal(track):
                     val_value -= 1.5 * weight
 
         # finally calculate the arousal change of tempo
-        ar_value += calculate_tempo(tempo_class)
+        ar_value += calculate_tempo(tempo_class, bpm)
         return ar_value, val_value
 
 
 
-def standarize(val, mean, std):
-    """ function to standardize a value """
-    return round((val - mean) / std, 3)
+def extract_track(xml_file, stream=False, cache=None, key_window=0, harmony=False):
+    """
+    function that extracts the musical features of every meter of a xml file
 
-if __name__ == "__main__":
+    with a key_window the key of every meter is found from the pitch classes of the key_window meters around it,
+    the meters get their own mode and the tonal modulations between them.
+    with harmony the chords are classified (chord_table) and every meter with chords gets its chord change rate
 
-    # create instances for all ontology classes, this is important for reasoning
-    instances = meo.create_instances()
-
-    directory = Path("xmlFiles/")
-
-    for xml_file in directory.rglob("*.xml"): 
-        print("niaou")
-        # parse a music XML file  
-        #xml_file = 'xmlFiles/Frygian.xml'
-        if not os.path.isfile(xml_file):
-            print("Abort")
-            break
-        print(xml_file)
-        score = converter.parse(xml_file)
-
-        # create an instance of the meo.Track class for the Track
-        base_name, extension = os.path.splitext(xml_file)
-        title = os.path.basename(base_name)
-        track = meo.Track(str(title))
-        
+    it doesn't touch the ontology, the features are saved as class names so that the result can be sent
+    from a worker process, add_track creates the ontology instances:
+    {'title': ..., 'mode': 'MajorMode', 'tempo': 'Andante', 'bpm': 96,
+     'meters': [MeterFeatures, ...]}
+    """
+    print(xml_file)
+    title = track_title(xml_file)
+
+    # midi files always go through the streaming path, they have no music21 score
+    stream = stream or midi_file.is_midi_file(xml_file)
+    if stream:
+        # mode and tempo are found after the last measure has been read
+        summary = {}
+        measures = iter_stream_measures(xml_file, summary, cache)
+    else:
+        score, score_measures = parse_score(xml_file, cache)
         # find the mode of the score
         mode = get_mode(score)
-        if mode:
-            track.hasMode.append(mode)
-
-        # find the tempo of the score and append it as a musical feature
+        # find the tempo of the score
         tempo_class, bpm = get_tempo(score)
+        measures = iter_score_measures(xml_file, score, score_measures)
+
+    # this is to save the previous dynamic marking if there is not a new one in the current meter
+    last_dynamic = None  
+    last_chord = None
+
+    meters = []
+    histograms = []  # pitch classes of every meter, for the key detection
+    melody = melody_kernel.MelodyArrays()  # melody notes of every meter, for the melody features
+    for i, dynamic_shape, rhythm_change, time_signature, notes, chords, rests, dyns, articulations, pitch_classes \
+            in measures:
+        print("Meter", i)
+        features = MeterFeatures(i)
+        meters.append(features)
+        histograms.append(pitch_classes)
+
+        """if time_signature:
+            meter.hasMusicalFeature.append(time_signature)
+            last_time_signature = time_signature
+        else:
+            time_signature = last_time_signature
+        """
 
-        # manually append the tempo for the Modes piece
-        if tempo_class is None:
-            tempo_class = meo.Andante
-            bpm=96
-
-        if tempo_class:
-            if bpm:
-                tempo_class.hasBPM.append(bpm)
-            track.hasTempo.append(instances[tempo_class])
-
-
-        # this is to save the previous dynamic marking if there is not a new one in the current meter
-        last_dynamic = None  
-        last_note = None
-        # used to check if the time signature changes
-        last_time_signature = None  
-        # save the average arousal for each meter
-        avg_ar = {}  
-        # saves the average valence for each meter
-        avg_val = {}  
-
-        meter_list = []
-        # count measures
-        num_of_measures, first_measure_num = count_measures(xml_file)
-        print(first_measure_num,num_of_measures)
-        for i in range(first_measure_num, num_of_measures +1):
-            print("Meter", i)
-            # create an instance for the meter:
-            meter = meo.Meter(str(title) + "_Meter" + str(i))
-            # append the meter to the meter list
-            meter_list.append(meter)
-            # connect the meter with its track
-            meter.meterHasTrack.append(track)
-
-            # append the mode and tempo to the meter
-            if mode:
-                meter.hasMode.append(instances[mode])
-            if tempo_class:
-                meter.hasTempo.append(instances[tempo_class])
-                
-            dynamic_shape, rhythm_change, time_signature = find_dynamic_shape_time_signature(xml_file, i)
-
-            """if time_signature:
-                meter.hasMusicalFeature.append(time_signature)
-                last_time_signature = time_signature
+        if dynamic_shape:
+            features.add('hasDynamicShape', dynamic_shape.name)
+        if rhythm_change:
+            features.add('hasRhythmChange', rhythm_change.name)
+
+        # append dynamics
+        if dyns:  
+            for dyn in dyns:
+                features.add('hasDynamics', dyn.name)
+            # make last_dynamic the last dynamic in the music sheet  
+            last_dynamic = dyns[-1]  
+        elif last_dynamic:
+            # append the last
+            features.add('hasDynamics', last_dynamic.name)
+
+        # append articulations
+        if articulations:  
+            for a in articulations: 
+                features.add('hasArticulation', a.name)
+
+        # chord types and chord change rate
+        if harmony and chords:
+            chord_types, changes, last_chord = chord_table.classify_chords(chords, last_chord)
+            for name in chord_types:
+                features.add('hasMusicalFeature', name)
+            features.add('hasMusicalFeature', chord_table.chord_change_rate(changes))
+
+        # the melody features are found for all the meters at once after the last meter
+        melody.add_meter(notes)
+
+    # melody direction, average pitch, pitch range and intervals of every meter
+    add_melody_features(meters, melody.features())
+
+    if stream:
+        # find the mode and the tempo of the whole piece
+        mode = mode_from_pitch_classes(summary['pitch_classes'])
+        tempo_class, bpm = tempo_from_bpm(summary['bpm'])
+
+    if key_window:
+        add_meter_keys(meters, histograms, key_window)
+
+    # manually append the tempo for the Modes piece
+    if tempo_class is None:
+        tempo_class = meo.Andante
+        bpm=96
+
+    return {'title': title, 'mode': mode.name if mode else None, 'tempo': tempo_class.name, 'bpm': bpm,
+            'meters': meters}
+
+def add_meter_keys(meters, histograms, key_window):
+    """
+    function that adds the mode of every meter and the tonal modulation when the key changes from the previous meter
+    """
+    previous = -1
+    for features, key in zip(meters, key_finder.meter_keys(histograms, key_window)):
+        if key < 0:
+            continue
+        features.add('hasMode', key_finder.mode_name(key))
+        if previous >= 0 and key != previous:
+            features.add('hasMusicalFeature', key_finder.modulation_name(previous, key))
+        previous = key
+
+def add_melody_features(meters, melody):
+    """
+    function that adds the melody direction, average pitch, pitch range and intervals of every meter
+    from the results of the melody kernel (melody_kernel.MelodyArrays.features)
+    """
+    for m, features in enumerate(meters):
+        if not melody.counts[m]:
+            continue
+        direction = melody.direction[m]
+        # append direction
+        if direction > 1: 
+            features.add('hasMelodyDirection', 'AscendingMelody')
+        elif direction < -1:  
+            features.add('hasMelodyDirection', 'DescendingMelody')
+        else:
+            features.add('hasMelodyDirection', 'UndulatingMelody')
+
+        # avg_pitch is a value corresponding to the average midi value of every note in the meter
+        avg_pitch = melody.average_pitch[m]
+        if avg_pitch:  
+            if avg_pitch > 71:
+                features.add('hasAveragePitch', 'HighPitch')
+            elif avg_pitch > 55:
+                features.add('hasAveragePitch', 'MediumPitch')
             else:
-                time_signature = last_time_signature
-            """
+                features.add('hasAveragePitch', 'LowPitch')
+
+        # an integer corresponding to the difference between the highest and the lowest note
+        pitch_range = melody.pitch_range[m]
+        if pitch_range: 
+            if pitch_range > 11:
+                features.add('hasPitchRange', 'WidePitchRange')
+            elif pitch_range < 8:
+                features.add('hasPitchRange', 'NarrowPitchRange')
+
+    # the interval of the last note of the previous meter with the first note of a meter has no duration,
+    # the intervals of the notes of a meter have the longest duration of the 2 notes
+    for m, boundary, interval, duration in zip(melody.pair_meter, melody.boundary, melody.intervals,
+                                               melody.pair_durations):
+        name = melody_kernel.INTERVAL_NAMES[interval]
+        if boundary:
+            meters[m].add_interval(name)
+        else:
+            meters[m].add_interval(name, melody.duration_names[duration])
 
-            if dynamic_shape:
-                meter.hasDynamicShape.append(dynamic_shape)
-            if rhythm_change:
-                meter.hasRhythmChange.append(rhythm_change)
+def add_track(extracted):
+    """
+    function that creates the track, its meters and their musical features in the ontology from the result of
+    extract_track, returns the track and the list of meters
+    """
+    # create an instance of the meo.Track class for the Track
+    track = meo.Track(extracted['title'])
+    mode = getattr(meo, extracted['mode']) if extracted['mode'] else None
+    tempo_class = getattr(meo, extracted['tempo'])
+    bpm = extracted['bpm']
+
+    if mode:
+        track.hasMode.append(mode)
+    if bpm:
+        tempo_class.hasBPM.append(bpm)
+    track.hasTempo.append(instances[tempo_class])
+
+    meter_list = []
+    triples = []
+    # composer and work of the track (the folders of the file), the queries find the tracks of a composer with them
+    if extracted.get('composer'):
+        triples.append((track, meo.trackHasComposer, extracted['composer']))
+    if extracted.get('work'):
+        triples.append((track, meo.trackHasWork, extracted['work']))
+    for features in extracted['meters']:
+        # create an instance for the meter:
+        meter = meo.Meter(extracted['title'] + "_Meter" + str(features.number))
+        # append the meter to the meter list
+        meter_list.append(meter)
+        # connect the meter with its track
+        triples.append((meter, meo.meterHasTrack, track))
+
+        # append the mode and tempo to the meter (unless the meter has its own mode)
+        if mode and not features.mode():
+            triples.append((meter, meo.hasMode, instances[mode]))
+        triples.append((meter, meo.hasTempo, instances[tempo_class]))
+
+    triples += feature_triples(meter_list, extracted['meters'])
+    meo.bulk_add_triples(triples)
+    return track, meter_list
+
+def feature_triples(meter_list, meters):
+    """
+    function that creates the (meter, property, feature) triples of the compact features (MeterFeatures) of the meters
 
-            # find notes, chords, rests, dynamics and articulations of a meter
-            notes, chords, rests, dyns, articulations = get_measure_notes(xml_file, score, i) 
-            
-            # append dynamics
-            if dyns:  
-                for dyn in dyns:
-                    meter.hasDynamics.append(
-                        instances[dyn])
-                    
-                # make last_dynamic the last dynamic in the music sheet  
-                last_dynamic = dyns[-1]  
-            elif last_dynamic:
-                # append the last
-                meter.hasDynamics.append(instances[last_dynamic])
-
-            # append articulations
-            if articulations:  
-                for a in articulations: 
-                    # every note has its own articulation, but we don't want to add it many times
-                    if a not in meter.hasMusicalFeature:  
-                        meter.hasArticulation.append(instances[a])
-
-            # notes - intervals
-            if notes:  
-                # if notes exist then we can also find these 3:
-                direction, avg_pitch, pitch_range = find_melody_direction_pitch_and_pitch_range(notes, last_note)
-                # append direction
-                if direction > 1: 
-                    meter.hasMelodyDirection.append(instances[meo.AscendingMelody])
-                elif direction < -1:  
-                    meter.hasMelodyDirection.append(instances[meo.DescendingMelody])
-                else:
-                    meter.hasMelodyDirection.append(instances[meo.UndulatingMelody])
-                
-                # avg_pitch is a value corresponding to the average midi value of every note in the meter
-                if avg_pitch:  
-                    if avg_pitch > 71:
-                        meter.hasAveragePitch.append(instances[meo.HighPitch])
-                    elif avg_pitch > 55:
-                        meter.hasAveragePitch.append(instances[meo.MediumPitch])
-                    else:
-                        meter.hasAveragePitch.append(instances[meo.LowPitch])
-
-                # an integer corresponding to the difference between the highest and the lowest note
-                if pitch_range: 
-                    if pitch_range > 11:
-                        meter.hasPitchRange.append(instances[meo.WidePitchRange])
-                    elif pitch_range < 8:
-                        meter.hasPitchRange.append(instances[meo.NarrowPitchRange])
-
-                # if last note (coming from the previous measure) exists 
-                # then we append to this meter the interval of the last note with the first note of this measure
-                if last_note:
-                    interval = find_intervals(last_note, notes[0])
-                    if interval != 'Invalid interval':
-                            meter.hasMusicalFeature.append(instances[interval]) 
-                
-                # for every note find interval  and append it 
-                for j in range(len(notes) - 1):
-                    interval = find_intervals(notes[j], notes[j + 1])
-                    if interval != 'Invalid interval':
-                        instances[interval].hasDuration = interval.hasDuration
-                        # append the interval to the meter
-                        meter.hasMusicalFeature.append(instances[interval]) 
-                # update the last note
-                last_note = notes[-1]
-            # if there are no notes in the measure then make last note None
-            else:
-                last_note = None 
+    the intervals of a meter are an IntervalCount individual for every (interval, duration) pair of the meter:
+    meter hasMusicalFeature count, count hasInterval interval, count hasIntervalCount n, count hasDuration duration
+    """
+    triples = []
+    for meter, features in zip(meter_list, meters):
+        for prop, class_name in features.feature_items():
+            feature_class = getattr(meo, class_name)
+            if prop in ('hasDynamicShape', 'hasRhythmChange'):
+                # dynamic shape and rhythm change are appended as classes
+                triples.append((meter, getattr(meo, prop), feature_class))
+                continue
+            triples.append((meter, getattr(meo, prop), instances[feature_class]))
+
+        for (class_name, duration), count in features.interval_counts().items():
+            interval_count = meo.IntervalCount(meter.name + "_" + class_name + "_" + str(duration))
+            triples.append((meter, meo.hasMusicalFeature, interval_count))
+            triples.append((interval_count, meo.hasInterval, instances[getattr(meo, class_name)]))
+            triples.append((interval_count, meo.hasIntervalCount, count))
+            if duration is not None:
+                triples.append((interval_count, meo.hasDuration, duration))
+    return triples
+
+def destroy_meter(meter):
+    """
+    function that removes a meter and its interval counts from the world
+    """
+    for mf in meter.hasMusicalFeature:
+        if isinstance(mf, meo.IntervalCount):
+            destroy_entity(mf)
+    destroy_entity(meter)
 
-        # run the reasoner:      
-        sync_reasoner_pellet(infer_property_values=True, debug=1)
+def score_meters(track, meter_list, triggers_lookup=None, bpm=None):
+    """
+    function that calculates the valence and arousal of every meter of a reasoned track and appends them to
+    the data properties, returns the dictionaries meter position -> value
+
+    if a triggers lookup is given the meters are scored with calculate_valence_arousal_fast (no reasoning needed),
+    bpm is the tempo of the track
+    """
+    # save the average arousal for each meter
+    avg_ar = {}  
+    # saves the average valence for each meter
+    avg_val = {}  
+
+    print(track.hasTempo)
+    # calculate and append the valence and arousal values to the dataProperties
+    for j,meter in enumerate(meter_list):
+        if triggers_lookup is not None:
+            avg_ar[j], avg_val[j] = calculate_valence_arousal_fast(meter, triggers_lookup, bpm)
+        else:
+            avg_ar[j], avg_val[j] = calculate_valence_arousal(meter, bpm)
+        meter.hasValenceValue.append(avg_val[j])
+        meter.hasArousalValue.append(avg_ar[j])
+    
+    
+    for meter in meter_list:
+        print(meter)
+        for mf in meter.hasMusicalFeature:
+            print(mf)
+        print(meter.hasValenceValue, meter.hasArousalValue)
+    return avg_val, avg_ar
+
+def plot_track(title, avg_val, avg_ar, stats=None):
+    """
+    function that standarizes the valence and arousal values of a track and plots them,
+    stats are the running statistics to standarize with (standardizer.py), by default the ones of the track
+    """
+    # standarize the values:
+    if stats is None:
+        stats = Standardizer().add_piece(None, avg_val.values(), avg_ar.values())
+    standarized_valence, standarized_arousal = stats.standardize(avg_val.values(), avg_ar.values())
 
-        print(track.hasTempo)
-        # calculate and append the valence and arousal values to the dataProperties
-        for j,meter in enumerate(meter_list):
-            avg_ar[j], avg_val[j] = calculate_valence_arousal(meter)
+    """
+    with open('valence_arousal.csv', 'a', newline='') as fp:
+        writer=csv.writer(fp)
+        writer.writerow(["title", "meter", "valence", "arousal"])
+        for i, (val, arous) in enumerate(zip(standarized_valence, standarized_arousal), start=1):
+            writer.writerow([title, i, val, arous])
+    """      
+    
+    # plot the valence and arousal values as the meters progress
+    plot_valence_arousal(standarized_valence, standarized_arousal, len(avg_val), title)
+
+def score_meters_vectorized(tracks, engine):
+    """
+    function that calculates the valence and arousal of the meters of a list of (extracted, track, meter list)
+    with one matrix product of the scoring engine and appends them to the data properties,
+    returns a list with the dictionaries (meter position -> valence, meter position -> arousal) of every track
+    """
+    extracted_tracks = [extracted for extracted, _, _ in tracks]
+    counts = engine.encode(extracted_tracks)
+    tempo_changes = []
+    for extracted in extracted_tracks:
+        # the bpm of the track, the tempo class has the bpm of every track with this tempo
+        tempo = calculate_tempo(getattr(meo, extracted['tempo']), extracted['bpm'])
+        tempo_changes += [tempo] * len(extracted['meters'])
+    valence, arousal = engine.score(counts, np.array(tempo_changes))
+
+    scores = []
+    row = 0
+    for extracted, track, meter_list in tracks:
+        avg_val = {}
+        avg_ar = {}
+        for j, meter in enumerate(meter_list):
+            avg_val[j] = float(valence[row])
+            avg_ar[j] = float(arousal[row])
             meter.hasValenceValue.append(avg_val[j])
             meter.hasArousalValue.append(avg_ar[j])
-        
-        
-        for meter in meter_list:
-            print(meter)
-            for mf in meter.hasMusicalFeature:
-                print(mf)
-            print(meter.hasValenceValue, meter.hasArousalValue)
-
-        # standarize the values:
-        valence_arr = np.array(list(avg_val.values()))
-        arousal_arr = np.array(list(avg_ar.values()))
-
-        val_mean, val_std = valence_arr.mean(), valence_arr.std()
-        aro_mean, aro_std = arousal_arr.mean(), arousal_arr.std()
-
-        standarized_valence = []
-        standarized_arousal = []
-        for val in avg_val.values():
-            standarized_valence.append(standarize(val, val_mean, val_std))
-        for ar in avg_ar.values():
-            standarized_arousal.append(standarize(ar, aro_mean, aro_std))
+            row += 1
+        scores.append((avg_val, avg_ar))
+    return scores
 
-        """
-        with open('valence_arousal.csv', 'a', newline='') as fp:
-            writer=csv.writer(fp)
-            writer.writerow(["title", "meter", "valence", "arousal"])
-            for i, (val, arous) in enumerate(zip(standarized_valence, standarized_arousal), start=1):
-                writer.writerow([title, i, val, arous])
-        """      
-        
-        # plot the valence and arousal values as the meters progress
-        plot_valence_arousal(standarized_valence, standarized_arousal, len(meter_list), title)
+def reason_and_score(tracks, destroy=False, triggers_lookup=None, check_consistency=False, engine=None,
+                     standardizer=None, transitions=None):
+    """
+    function that runs the reasoner once for a list of (extracted, track, meter list) and then calculates
+    and plots the valence and arousal of all their meters
+
+    if destroy is True the tracks and meters are removed from the world afterwards, so that the next reasoning
+    doesn't have to go through them again.
+    with a triggers lookup (fast mode) or a scoring engine (vectorized mode) the reasoner only runs
+    if check_consistency is True.
+    the values are standarized with the statistics of the standardizer (per piece if there is none) and the meters
+    are classified into the valence and arousal meter classes by their values (meter_classes.py).
+    the hasNextMeter links of the meters are written after the reasoner and the links of the earlier tracks are
+    kept out of the world while it runs, so it never goes through the transitive isFollowedByMeter chains,
+    and the class sequences of the tracks are added to the transitions index if given
+    """
+    if triggers_lookup is None and engine is None:
+        # run the reasoner:      
+        with meter_links_detached():
+            sync_reasoner_pellet(infer_property_values=True, debug=1)
+    elif check_consistency:
+        # raises OwlReadyInconsistentOntologyError if the ontology is inconsistent
+        with meter_links_detached():
+            sync_reasoner_pellet(debug=1)
+
+    if engine is not None:
+        scores = score_meters_vectorized(tracks, engine)
+    else:
+        scores = [score_meters(track, meter_list, triggers_lookup, extracted['bpm'])
+                  for extracted, track, meter_list in tracks]
+
+    for (extracted, track, meter_list), (avg_val, avg_ar) in zip(tracks, scores):
+        stats = None
+        if standardizer is not None:
+            stats = standardizer.add_piece(extracted.get('composer'), avg_val.values(), avg_ar.values(),
+                                           extracted['title'], track.trackHasContentHash)
+        plot_track(extracted['title'], avg_val, avg_ar, stats)
+        # overall valence and arousal of the track (Q1)
+        if meter_list:
+            meo.bulk_add_triples([(track, meo.trackHasAverageValence, round(float(np.mean(list(avg_val.values()))), 3)),
+                                  (track, meo.trackHasAverageArousal, round(float(np.mean(list(avg_ar.values()))), 3))])
+        # valence and arousal meter classes of the scored meters (no second reasoning)
+        valence_classes, arousal_classes = meter_classes.classify_meters(
+            meter_list, [avg_val[j] for j in range(len(meter_list))], [avg_ar[j] for j in range(len(meter_list))])
+        # materialized feature and interval counts of the composer
+        aggregates.add_track(extracted, [cls.name if cls else '' for cls in valence_classes])
+        if transitions is not None:
+            transitions.add_track(extracted['title'], [features.number for features in extracted['meters']],
+                                  zip(valence_classes, arousal_classes), track.trackHasContentHash)
+        if destroy:
+            for meter in meter_list:
+                destroy_meter(meter)
+            destroy_entity(track)
+        else:
+            meo.bulk_add_triples(next_meter_triples(meter_list))
 
+def next_meter_triples(meter_list):
+    """
+    function that creates the hasNextMeter and followsMeter triples of the consecutive meters of a track
+    """
+    triples = []
+    for meter, next_meter in zip(meter_list, meter_list[1:]):
+        triples.append((meter, meo.hasNextMeter, next_meter))
+        triples.append((next_meter, meo.followsMeter, meter))
+    return triples
 
+# properties of the links between the meters, the reasoner doesn't need them
+METER_LINK_PROPERTIES = [meo.hasNextMeter, meo.followsMeter, meo.isFollowedByMeter]
 
+@contextmanager
+def meter_links_detached(world=meo.default_world):
+    """
+    function that removes the links between the meters (of the tracks of earlier chunks or of a persistent world)
+    from the quadstore while the reasoner runs and writes them back afterwards
+    """
+    db = world.graph.db
+    storids = [prop.storid for prop in METER_LINK_PROPERTIES]
+    where = " WHERE p IN (" + ",".join("?" * len(storids)) + ")"
+    rows = db.execute("SELECT c, s, p, o FROM objs" + where, storids).fetchall()
+    db.execute("DELETE FROM objs" + where, storids)
+    try:
+        yield
+    finally:
+        db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", rows)
+
+# emotional effect -> (change of valence, change of arousal), the same rules as calculate_valence_arousal
+EMOTION_WEIGHTS = {
+    meo.VeryHighArousal: (0, 2),
+    meo.HighArousal: (0, 1.5),
+    meo.LowArousal: (0, -1.5),
+    meo.VeryLowArousal: (0, -2),
+    meo.VeryPositiveValence: (2, 0),
+    meo.MediumPositiveValence: (1, 0),
+    meo.LowNegativeValence: (-1, 0),
+    meo.VeryNegativeValence: (-2, 0),
+    meo.PositiveValence: (1.5, 0),
+    meo.NegativeValence: (-1.5, 0),
+}
+
+# hasMusicalFeature and its sub properties (hasTempo, hasDynamics, ...), this is what the reasoner gathers
+# in hasMusicalFeature
+FEATURE_PROPERTIES = sorted(meo.hasMusicalFeature.descendants(), key=lambda prop: prop.name)
+
+def meter_features(meter):
+    """
+    function that finds the musical features of a meter without the reasoner
+    """
+    features = []
+    for prop in FEATURE_PROPERTIES:
+        features.extend(prop[meter])
+    # every feature once, like the values the reasoner infers
+    return list(dict.fromkeys(features))
+
+def calculate_valence_arousal_fast(meter, triggers_lookup, bpm=None):
+    """
+    function that calculates valence and arousal of a meter like calculate_valence_arousal, but it doesn't need
+    the reasoner: the features are read from the sub properties and their triggers from the triggers lookup
+    (meo.create_triggers_lookup), bpm is the tempo of the track
+    """
+    ar_value = 0
+    val_value = 0
+    tempo_class = None
+    features = meter_features(meter)
+    major_mode = instances[meo.MajorMode] in features
+    for mf in features:
+        weight = 1
+        if isinstance(mf, meo.IntervalCount):
+            # find the weight depending on the duration of the interval and how many times it's in the meter
+            weight = find_weight(mf) * mf.hasIntervalCount[0]
+            mf = mf.hasInterval[0]
+
+        # dynamic shapes and rhythm changes are saved as classes
+        mf_class = mf if isinstance(mf, ThingClass) else mf.is_a[0]
+
+        if issubclass(mf_class, meo.Tempo):  # if it's about tempo we will calculate it later
+            if mf_class != meo.FastTempo and mf_class != meo.SlowTempo and mf_class != meo.MediumTempo:
+                tempo_class = mf_class
+                continue
+
+        # major and minor modes are more important, so we check them separately
+        if mf == instances[meo.MajorMode]:
+            val_value += 3
+            continue
+        if mf == instances[meo.MinorMode]:
+            val_value -= 3
+            continue
+
+        # major Second Interval in major mode triggers different emotional stimuli
+        if major_mode and (mf_class == meo.MajorSecondInterval or mf_class == meo.MinorSeventhInterval):
+            continue
+
+        # for tone we don't want tone to change dramatically the outcome
+        if isinstance(mf, meo.Tone):
+            weight = 0.5
+
+        for emotion in triggers_lookup.get(mf_class, []):
+            if emotion in EMOTION_WEIGHTS:
+                val_change, ar_change = EMOTION_WEIGHTS[emotion]
+                val_value += val_change * weight
+                ar_value += ar_change * weight
+
+    # finally calculate the arousal change of tempo
+    ar_value += calculate_tempo(tempo_class, bpm)
+    return ar_value, val_value
+
+# the files of the corpus: musicxml and midi files
+SCORE_EXTENSIONS = ('.xml',) + midi_file.MIDI_EXTENSIONS
+
+# the directory of the corpus, the folders under it are the composer and the work of a file
+CORPUS_DIRECTORY = Path("xmlFiles/")
+# joins the folders of a file in its title (an IRI name and a file name of the plots, it can't have a '/')
+TITLE_SEPARATOR = "__"
+
+def track_title(xml_file, directory=CORPUS_DIRECTORY):
+    """
+    function that finds the title of a file, the track identity: its path under the corpus directory without the
+    extension (e.g. xmlFiles/Bach/Fugue/score.xml -> Bach__Fugue__score), so files with the same name in other
+    folders are other tracks. a file outside the directory has the name of the file
+    """
+    path = Path(xml_file).with_suffix('')
+    try:
+        parts = path.relative_to(directory).parts
+    except ValueError:
+        parts = (path.name,)
+    return TITLE_SEPARATOR.join(parts)
+
+def track_composer(xml_file, directory):
+    """
+    function that finds the composer of a file: the first folder under the corpus directory
+    (e.g. xmlFiles/Bach/Fugue/bwv_846.xml), None for the files directly in the directory
+    """
+    parts = Path(xml_file).relative_to(directory).parts
+    if len(parts) > 1:
+        return parts[0]
+    return None
+
+def track_work(xml_file, directory):
+    """
+    function that finds the work of a file: the folders between the composer and the file
+    (e.g. xmlFiles/Bach/Fugue/bwv_846/score.xml -> Fugue/bwv_846), None if there are none
+    """
+    parts = Path(xml_file).relative_to(directory).parts
+    if len(parts) > 2:
+        return "/".join(parts[1:-1])
+    return None
+
+def is_processed(xml_file, file_hashes):
+    """
+    function that checks if a file is already in the (persistent) world: a track with the same title and
+    the same content hash. a track with the same title but another hash is removed so the file is processed again
+    """
+    title = track_title(xml_file)
+    file_hashes[title] = file_sha256(xml_file)
+    track = meo.onto[title]
+    if not isinstance(track, meo.Track):
+        return False
+    if track.trackHasContentHash == file_hashes[title]:
+        return True
+    aggregates.remove_track(track)
+    for meter in track.trackHasMeter:
+        destroy_meter(meter)
+    destroy_entity(track)
+    return False
+
+def standarize(val, mean, std):
+    """ function to standardize a value """
+    return round((val - mean) / std, 3)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Calculate valence and arousal of every meter of the xml files")
+    parser.add_argument("--stream", action="store_true",
+                        help="read the files measure by measure with the streaming extractor instead of music21")
+    parser.add_argument("--cache-dir", default=".score_cache",
+                        help="directory of the cache of parsed scores and extracted measures")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="maximum size of the cache in MB, the least recently used files are deleted")
+    parser.add_argument("--no-cache", action="store_true", help="always parse the xml files")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes that extract the features of the files")
+    parser.add_argument("--batch", action="store_true",
+                        help="add all the tracks first and run the reasoner once for the whole corpus")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="run the reasoner once for every N tracks, reasoned tracks are removed from the world")
+    parser.add_argument("--fast", action="store_true",
+                        help="score the meters with the triggers declared in the ontology, without the reasoner")
+    parser.add_argument("--check-consistency", action="store_true",
+                        help="with --fast or --vectorized, still run the reasoner to check that the ontology is consistent")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="score all the meters of a chunk with one matrix product, without the reasoner")
+    parser.add_argument("--key-window", type=int, default=0, metavar="N",
+                        help="find the key of every meter from the N meters around it (per meter mode and tonal "
+                             "modulations), 0 uses the mode of the whole piece")
+    parser.add_argument("--harmony", action="store_true",
+                        help="classify the chords of every meter and find its chord change rate")
+    parser.add_argument("--normalize", choices=Standardizer.SCOPES, default="piece",
+                        help="standarize the values with the running statistics of the piece, of its composer "
+                             "or of the whole corpus")
+    parser.add_argument("--snapshot",
+                        help="load the instances and the triggers lookup from this snapshot file (see snapshot.py)")
+    parser.add_argument("--stats",
+                        help="file with the running statistics of earlier runs, they are updated at the end")
+    parser.add_argument("--transitions",
+                        help="file with the meter class sequences of the tracks (transitions.py), updated at the end")
+    args = parser.parse_args()
+
+    # number of tracks that are reasoned together, by default the reasoner runs after every file
+    chunk_size = 1
+    if args.chunk_size > 0:
+        chunk_size = args.chunk_size
+    elif args.batch:
+        chunk_size = float("inf")
+    # reasoned chunks are removed from the world, except if the world is persistent (the tracks are kept in the file)
+    destroy = args.chunk_size > 0 and not meo.PERSISTENT_WORLD
+
+    cache = None
+    if not args.no_cache:
+        cache = ScoreCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    if args.snapshot:
+        # instances and triggers lookup from the precompiled snapshot (built if it's missing or stale)
+        instances, ontology_triggers = open_snapshot(args.snapshot)
+    else:
+        # create instances for all ontology classes, this is important for reasoning
+        instances = meo.create_instances()
+        ontology_triggers = meo.create_triggers_lookup() if args.fast or args.vectorized else None
+    triggers_lookup = ontology_triggers if args.fast else None
+    engine = None
+    if args.vectorized:
+        engine = ScoringEngine(ontology_triggers, EMOTION_WEIGHTS, duration_weight)
+
+    standardizer = Standardizer(args.normalize)
+    if args.stats and os.path.exists(args.stats):
+        with open(args.stats, 'rb') as fp:
+            standardizer.merge(pickle.load(fp))
+
+    transitions = None
+    if args.transitions:
+        transitions = TransitionIndex()
+        if os.path.exists(args.transitions):
+            with open(args.transitions, 'rb') as fp:
+                transitions.merge(pickle.load(fp))
+
+    directory = CORPUS_DIRECTORY
+    # sorted so that the tracks are added in the same order for any number of workers
+    xml_files = sorted(xml_file for xml_file in directory.rglob("*")
+                       if xml_file.suffix.lower() in SCORE_EXTENSIONS and os.path.isfile(xml_file))
+
+    file_hashes = {}
+    if meo.PERSISTENT_WORLD:
+        # skip the files that are already in the persistent world
+        xml_files = [xml_file for xml_file in xml_files if not is_processed(xml_file, file_hashes)]
+        print(len(xml_files), "new or changed files")
+        # workers only extract features, they don't open the persistent world
+        os.environ.pop("MEO_WORLD", None)
+
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        # map returns the results in the order of the files
+        extracted_tracks = executor.map(extract_track, xml_files, repeat(args.stream), repeat(cache),
+                                        repeat(args.key_window), repeat(args.harmony))
+    else:
+        executor = None
+        extracted_tracks = (extract_track(xml_file, args.stream, cache, args.key_window, args.harmony)
+                            for xml_file in xml_files)
+
+    # tracks that have been added to the ontology but not reasoned yet
+    pending_tracks = []
+    for xml_file, extracted in zip(xml_files, extracted_tracks):
+        extracted['composer'] = track_composer(xml_file, directory)
+        extracted['work'] = track_work(xml_file, directory)
+        track, meter_list = add_track(extracted)
+        if meo.PERSISTENT_WORLD:
+            track.trackHasContentHash = file_hashes[extracted['title']]
+        pending_tracks.append((extracted, track, meter_list))
+        if len(pending_tracks) >= chunk_size:
+            reason_and_score(pending_tracks, destroy, triggers_lookup, args.check_consistency, engine, standardizer,
+                             transitions)
+            pending_tracks = []
+            if meo.PERSISTENT_WORLD:
+                meo.default_world.save()
+    if pending_tracks:
+        reason_and_score(pending_tracks, destroy, triggers_lookup, args.check_consistency, engine, standardizer,
+                             transitions)
+    if meo.PERSISTENT_WORLD:
+        meo.default_world.save()
+
+    if args.stats:
+        with open(args.stats, 'wb') as fp:
+            pickle.dump(standardizer, fp)
+    if args.transitions:
+        with open(args.transitions, 'wb') as fp:
+            pickle.dump(transitions, fp)
+
+    if executor is not None:
+        executor.shutdown()
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+
+# on-disk cache for parsed scores and extracted measures, so that re-runs over an unchanged corpus skip parsing.
+# an entry is a file that holds a sequence of pickled objects, it's named after the sha256 of the xml bytes
+# and the version of the extractor that produced it (a new version never reads old entries)
+
+def file_sha256(xml_file, prefix=b''):
+    """
+    function that finds the sha256 of a prefix and the bytes of a file
+    """
+    sha = hashlib.sha256()
+    sha.update(prefix)
+    with open(xml_file, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ScoreCache:
+    """
+    content addressed cache with least recently used eviction when the entries are bigger than max_bytes
+    """
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, xml_file, version):
+        """
+        function that finds the key of a file: sha256 of the version and the file's bytes
+        """
+        return file_sha256(xml_file, str(version).encode() + b'\0')
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key):
+        """
+        function that returns an iterator over the objects of an entry, or None if the entry doesn't exist
+        """
+        path = self.path(key)
+        try:
+            # mark the entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return self.read_entry(path)
+
+    def read_entry(self, path):
+        with open(path, 'rb') as fp:
+            while True:
+                try:
+                    yield pickle.load(fp)
+                except EOFError:
+                    return
+
+    def put(self, key, items):
+        """
+        generator that yields the items and writes them to the entry of the key at the same time
+
+        the entry is only stored if all the items were consumed, so a half written entry is never read
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        completed = False
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                for item in items:
+                    pickle.dump(item, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                    yield item
+            os.replace(tmp_path, self.path(key))
+            completed = True
+        finally:
+            if not completed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def evict(self):
+        """
+        function that deletes the least recently used entries until the cache fits in max_bytes
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,83 @@
+import numpy as np
+import MusicEmotionOntology as meo
+
+
+# vectorized valence/arousal scoring: every meter is a row of feature counts (weighted by the duration of the
+# intervals) and the valence and arousal of all the meters are one matrix product with a
+# features x (valence, arousal) weight matrix.
+# it works on the results of parseXML.extract_track, so it doesn't need the ontology individuals or the reasoner.
+# parseXML.calculate_valence_arousal is the reference implementation of the rules
+
+class ScoringEngine:
+    """
+    triggers_lookup: musical feature class -> emotional effects (meo.create_triggers_lookup)
+    emotion_weights: emotional effect -> (change of valence, change of arousal)
+    duration_weight: function duration type -> weight of an interval
+    """
+
+    def __init__(self, triggers_lookup, emotion_weights, duration_weight):
+        self.feature_classes = sorted(triggers_lookup, key=lambda cls: cls.name)
+        self.feature_index = {cls.name: i for i, cls in enumerate(self.feature_classes)}
+        self.duration_weight = duration_weight
+
+        self.weights = np.zeros((len(self.feature_classes), 2))
+        for i, cls in enumerate(self.feature_classes):
+            # major and minor modes are more important
+            if cls == meo.MajorMode:
+                self.weights[i] = (3, 0)
+                continue
+            if cls == meo.MinorMode:
+                self.weights[i] = (-3, 0)
+                continue
+            # tempo is added separately from the bpm
+            if issubclass(cls, meo.Tempo):
+                continue
+            for effect in triggers_lookup[cls]:
+                if effect in emotion_weights:
+                    self.weights[i] += emotion_weights[effect]
+            # for tone we don't want tone to change dramatically the outcome
+            if issubclass(cls, meo.Tone):
+                self.weights[i] *= 0.5
+
+        # major Second Interval in major mode triggers different emotional stimuli
+        self.major_mode_ignored = [self.feature_index['MajorSecondInterval'], self.feature_index['MinorSeventhInterval']]
+
+    def encode(self, extracted_tracks):
+        """
+        function that creates the meters x features matrix of a list of extracted tracks
+
+        every feature is counted once per meter (like the features the reasoner gathers in hasMusicalFeature),
+        except the intervals: every (interval, duration) count of the meter adds count x the weight of the duration
+        (like the IntervalCount individuals)
+        """
+        cells = {}  # (row, column) -> weight
+        row = 0
+        for extracted in extracted_tracks:
+            for features in extracted['meters']:
+                # a meter with its own mode (per meter key detection) doesn't get the mode of the track
+                mode = features.mode() or extracted['mode']
+                if mode:
+                    cells[(row, self.feature_index[mode])] = 1
+                for _, class_name in features.feature_items():
+                    cells[(row, self.feature_index[class_name])] = 1
+                for (class_name, duration), count in features.interval_counts().items():
+                    column = self.feature_index[class_name]
+                    cells[(row, column)] = cells.get((row, column), 0) + count * self.duration_weight(duration)
+                if mode == 'MajorMode':
+                    for column in self.major_mode_ignored:
+                        cells.pop((row, column), None)
+                row += 1
+
+        counts = np.zeros((row, len(self.feature_classes)))
+        if cells:
+            rows, columns = zip(*cells.keys())
+            counts[list(rows), list(columns)] = list(cells.values())
+        return counts
+
+    def score(self, counts, tempo_arousal):
+        """
+        function that calculates valence and arousal of every row of the counts matrix,
+        tempo_arousal is the arousal change of the tempo of every row
+        """
+        values = counts @ self.weights
+        return values[:, 0], values[:, 1] + tempo_arousal
@@ -0,0 +1,121 @@
+import io
+import os
+import sqlite3
+import tempfile
+import owlready2
+import MusicEmotionOntology as meo
+from score_cache import file_sha256
+
+
+# precompiled snapshot of the ontology: an owlready2 sqlite world with the ontology, the individuals of
+# create_instances() and the triggers table of create_triggers_lookup(), tagged with the sha256 of
+# MusicEmotionOntology.py (and the version of owlready2), so it's rebuilt when the ontology source changes.
+# at startup the snapshot is opened read-only: the triples of the individuals are copied into the world with one
+# executemany and the triggers lookup is read from its table, instead of running create_instances() and
+# create_triggers_lookup()
+
+SNAPSHOT_TABLES = [
+    "CREATE TABLE snapshot_version (version TEXT)",
+    "CREATE TABLE snapshot_instances (class TEXT, instance TEXT)",  # iris of a class and of its instance
+    "CREATE TABLE snapshot_triggers (feature TEXT, effect TEXT)",  # iris, effect is NULL for no triggers
+]
+
+
+def ontology_version():
+    """
+    function that finds the version of the ontology: the sha256 of the owlready2 version and of its source file
+    """
+    return file_sha256(meo.__file__, owlready2.VERSION.encode() + b'\0')
+
+
+def build_snapshot(path):
+    """
+    function that creates the instances and the triggers lookup and writes them with the ontology to the
+    snapshot world, returns (instances, triggers lookup) like create_instances() and create_triggers_lookup()
+    """
+    instances = meo.create_instances()
+    triggers_lookup = meo.create_triggers_lookup()
+    ontology = io.BytesIO()
+    meo.onto.save(ontology, 'ntriples')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        world = owlready2.World(filename=tmp_path)
+        world.get_ontology(meo.onto.base_iri).load(fileobj=io.BytesIO(ontology.getvalue()), format='ntriples')
+        db = world.graph.db
+        for table in SNAPSHOT_TABLES:
+            db.execute(table)
+        db.execute("INSERT INTO snapshot_version VALUES (?)", (ontology_version(),))
+        db.executemany("INSERT INTO snapshot_instances VALUES (?,?)",
+                       [(cls.iri, instance.iri) for cls, instance in instances.items()])
+        db.executemany("INSERT INTO snapshot_triggers VALUES (?,?)",
+                       [(cls.iri, effect.iri) for cls, effects in triggers_lookup.items() for effect in effects] +
+                       [(cls.iri, None) for cls, effects in triggers_lookup.items() if not effects])
+        world.save()
+        world.close()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return instances, triggers_lookup
+
+
+def load_snapshot(path, world=meo.default_world):
+    """
+    function that copies the instances of the snapshot into the world (a persistent world may already have them)
+    and reads the triggers lookup, returns (instances, triggers lookup) or None if there is no snapshot or it was
+    built from another version of the ontology
+    """
+    if not os.path.exists(path):
+        return None
+    snapshot = sqlite3.connect("file:" + os.path.abspath(path) + "?mode=ro", uri=True)
+    try:
+        try:
+            version = snapshot.execute("SELECT version FROM snapshot_version").fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        if version is None or version[0] != ontology_version():
+            return None
+        class_instances = snapshot.execute("SELECT class, instance FROM snapshot_instances").fetchall()
+        triggers = snapshot.execute("SELECT feature, effect FROM snapshot_triggers ORDER BY rowid").fetchall()
+        # the triples of the instances, with iris instead of the storids of the snapshot
+        triples = snapshot.execute("""
+            SELECT rs.iri, rp.iri, ro.iri FROM snapshot_instances i
+            JOIN resources rs ON rs.iri = i.instance
+            JOIN objs q ON q.s = rs.storid
+            JOIN resources rp ON rp.storid = q.p
+            JOIN resources ro ON ro.storid = q.o""").fetchall()
+    finally:
+        snapshot.close()
+
+    c = meo.onto.graph.c
+    abbreviate = world._abbreviate
+    world.graph.db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)",
+                               [(c, abbreviate(s), abbreviate(p), abbreviate(o)) for s, p, o in triples])
+
+    instances = {world[cls]: world[instance] for cls, instance in class_instances}
+    triggers_lookup = {}
+    for feature, effect in triggers:
+        effects = triggers_lookup.setdefault(world[feature], [])
+        if effect is not None:
+            effects.append(world[effect])
+    return instances, triggers_lookup
+
+
+def open_snapshot(path):
+    """
+    function that loads the snapshot, or builds it if it's missing or stale
+    """
+    loaded = load_snapshot(path)
+    if loaded is None:
+        print("building the ontology snapshot", path)
+        return build_snapshot(path)
+    return loaded
+
+
+# python snapshot.py [file] builds the snapshot
+if __name__ == "__main__":
+    import sys
+    build_snapshot(sys.argv[1] if len(sys.argv) > 1 else "MusicEmotionsOntology.snapshot")
@@ -0,0 +1,228 @@
+import re
+import MusicEmotionOntology as meo
+import aggregates
+
+
+# the queries of SPARQL/Q1 - Q8 run against the world of the ontology with owlready's native sparql engine
+# (e.g. the persistent world of MEO_WORLD after parseXML.py), so the composer comparisons are computed
+# from the processed tracks instead of exported by hand.
+# the queries select a composer like the ones of the SPARQL folder, with a regex on the name of the meter/track
+# (the last parameter), but they are rewritten into a lookup of the composer of the track (trackHasComposer, found
+# with owlready's index of the data values) unless the names are matched. without a composer the filter is removed.
+# every variant of a query is parsed once and kept prepared.
+# Q2, Q3 and Q7 can also read the materialized counts of aggregates.py (of the composers of the tracks)
+
+PREFIX = ("PREFIX meo: <http://www.semanticweb.org/musicEmotionOntology#>\n"
+          "PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>\n")
+
+
+def meter_features(variable):
+    """
+    function that returns the pattern of the musical features of ?meter: the values of hasMusicalFeature and of its
+    sub properties (hasDynamics, hasArticulation, ...), that only the reasoner gathers in hasMusicalFeature, and the
+    interval of its interval counts instead of the counts (so the features are grouped by their class)
+    """
+    return ("{ ?meter ?featureProperty " + variable + " . ?featureProperty rdfs:subPropertyOf* meo:hasMusicalFeature .\n"
+            "      FILTER NOT EXISTS { " + variable + " a meo:IntervalCount } }\n"
+            "    UNION { ?meter meo:hasMusicalFeature ?count . ?count meo:hasInterval " + variable + " }")
+
+
+# query name -> (description, columns, query)
+QUERIES = {
+    'Q1': ("overall valence and arousal of the tracks of a composer", ['avgval', 'avgar'], """
+SELECT (AVG(?valence) AS ?avgval) (AVG(?arousal) AS ?avgar)
+WHERE {
+    ?track a meo:Track ;
+           meo:trackHasAverageValence ?valence ;
+           meo:trackHasAverageArousal ?arousal .
+    FILTER REGEX(STR(?track), ??1, "")
+}
+"""),
+    'Q2': ("most commonly used musical features of a composer", ['mf', 'c'], """
+SELECT ?mf (COUNT(DISTINCT ?meter) AS ?c)
+WHERE {
+    ?meter a meo:Meter .
+    """ + meter_features("?mf") + """
+    FILTER REGEX(STR(?meter), ??1, "")
+}
+GROUP BY ?mf HAVING (?c > 2) ORDER BY DESC(?c)
+"""),
+    'Q3': ("most commonly used intervals of a composer", ['mf', 'a'], """
+SELECT ?mf (COUNT(?mf) AS ?a)
+WHERE {
+    ?meter meo:hasMusicalFeature ?i .
+    ?i meo:hasInterval ?mf .
+    ?i meo:hasIntervalCount ?c .
+    FILTER REGEX(STR(?meter), ??1, "")
+}
+GROUP BY ?mf ORDER BY DESC(?a)
+"""),
+    # the dynamic shapes are classes
+    'Q4': ("meters with a dynamic shape of a composer", ['mf', 'count'], """
+SELECT ?mf (COUNT(?meter) AS ?count)
+WHERE {
+    ?meter meo:hasDynamicShape ?mf .
+    ?meter meo:hasArousalValue ?a .
+    VALUES ?mf { meo:Crescendo meo:Diminuendo }
+    FILTER REGEX(STR(?meter), ??1, "")
+}
+GROUP BY ?mf
+"""),
+    'Q5': ("musical features of the meters of a meter class", ['meter', 'mf', 'interval', 'c'], """
+SELECT DISTINCT ?meter ?mf ?interval ?c
+WHERE {
+    ?meter a ??1 ;
+           ?featureProperty ?mf .
+    ?featureProperty rdfs:subPropertyOf* meo:hasMusicalFeature .
+    OPTIONAL {
+        ?mf meo:hasInterval ?interval .
+        ?mf meo:hasIntervalCount ?c .
+    }
+    FILTER REGEX(STR(?meter), ??2, "")
+}
+"""),
+    'Q6': ("very positive valence meters followed by a low negative valence meter", ['meter1', 'v1', 'meter2', 'v2'], """
+SELECT ?meter1 ?v1 ?meter2 ?v2
+WHERE {
+    ?meter1 a meo:VeryPositiveValenceMeter ;
+            meo:hasValenceValue ?v1 ;
+            meo:hasNextMeter ?meter2 .
+    ?meter2 a meo:LowNegativeValenceMeter ;
+            meo:hasValenceValue ?v2 .
+    FILTER REGEX(STR(?meter1), ??1, "")
+}
+"""),
+    'Q7': ("musical features of the very positive valence meters", ['mf', 'meterCount'], """
+SELECT ?mf (COUNT(DISTINCT ?meter) AS ?meterCount)
+WHERE {
+    ?meter a meo:VeryPositiveValenceMeter .
+    """ + meter_features("?mf") + """
+    FILTER REGEX(STR(?meter), ??1, "")
+}
+GROUP BY ?mf ORDER BY DESC(?meterCount)
+"""),
+    'Q8': ("musical features of the very positive valence meters in minor mode", ['commonMf', 'meterCount'], """
+SELECT ?commonMf (COUNT(DISTINCT ?meter) AS ?meterCount)
+WHERE {
+    ?meter a meo:VeryPositiveValenceMeter ;
+           meo:hasMode meo:minormode_instance .
+    """ + meter_features("?commonMf") + """
+    FILTER REGEX(STR(?meter), ??1, "")
+}
+GROUP BY ?commonMf ORDER BY DESC(?meterCount)
+"""),
+}
+
+DEFAULT_METER_CLASS = 'VeryPositiveValenceMeter'  # meter class of Q5
+
+# the regex filters have empty flags, owlready's REGEX fails without them
+COMPOSER_FILTER = re.compile(r"FILTER REGEX\(STR\(\?(\w+)\), (\?\?\d), \"\"\)")
+
+_prepared = {}  # (query name, composer match, world) -> prepared query
+
+
+def composer_lookup(match):
+    """
+    function that rewrites a composer filter into the triples of the composer of the track:
+    ?track trackHasComposer composer, or ?meter meterHasTrack ?t . ?t trackHasComposer composer for the meters
+    """
+    variable, param = match.groups()
+    if variable == 'track':
+        return "?track meo:trackHasComposer " + param + " ."
+    return ("?" + variable + " meo:meterHasTrack ?" + variable + "Track . ?" + variable + "Track meo:trackHasComposer "
+            + param + " .")
+
+
+def query_text(name, match='lookup'):
+    """
+    function that returns the text of a query for a way of matching the composer:
+    'lookup' (composer of the track), 'regex' (the names, like the SPARQL folder) or None (all the tracks)
+    """
+    query = QUERIES[name][2]
+    if match == 'lookup':
+        query = COMPOSER_FILTER.sub(composer_lookup, query)
+    elif match is None:
+        query = COMPOSER_FILTER.sub("", query)
+    return PREFIX + query
+
+
+def prepare(name, match='lookup', world=meo.default_world):
+    """
+    function that parses a query once and keeps the prepared query
+    """
+    key = (name, match, id(world))
+    if key not in _prepared:
+        _prepared[key] = world.prepare_sparql(query_text(name, match))
+    return _prepared[key]
+
+
+def value_name(value):
+    """
+    function that returns the name of an entity of a result (e.g. majormode_instance), other values as they are
+    """
+    return getattr(value, 'name', value)
+
+
+def run_query(name, composer=None, meter_class=DEFAULT_METER_CLASS, match_names=False, materialized=False,
+              world=meo.default_world):
+    """
+    function that executes a query for a composer (None for all the tracks) and returns the results as a DataFrame,
+    the composer is the composer of the tracks (track_composer), or a part of their names if match_names is set.
+    with materialized the query reads the counts tables if it can (see aggregates.MATERIALIZED)
+    """
+    import pandas as pd
+
+    if materialized and name in aggregates.MATERIALIZED:
+        return aggregates.MATERIALIZED[name](composer or None, world=world)
+    params = []
+    if name == 'Q5':
+        params.append(getattr(meo, meter_class))
+    if not composer:
+        match = None
+    elif match_names:
+        # the composer is matched literally in the names
+        match = 'regex'
+        params.append(re.escape(composer))
+    else:
+        match = 'lookup'
+        params.append(composer)
+    rows = [[value_name(value) for value in row] for row in prepare(name, match, world).execute(params)]
+    return pd.DataFrame(rows, columns=QUERIES[name][1])
+
+
+def compare_composers(name, composers, meter_class=DEFAULT_METER_CLASS, match_names=False, materialized=False,
+                      world=meo.default_world):
+    """
+    function that executes a query for every composer and returns one DataFrame with a composer column
+    """
+    import pandas as pd
+
+    frames = []
+    for composer in composers:
+        df = run_query(name, composer, meter_class, match_names, materialized, world)
+        df.insert(0, 'composer', composer)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+# MEO_WORLD=corpus.sqlite3 python sparql_queries.py Q1 Bach Beethoven Haydn Chopin
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the SPARQL queries of the SPARQL folder on the processed tracks")
+    parser.add_argument("query", choices=sorted(QUERIES), help="query to run")
+    parser.add_argument("composers", nargs="*", default=[""], help="composers to compare (default: all the tracks)")
+    parser.add_argument("--meter-class", default=DEFAULT_METER_CLASS, help="meter class of Q5")
+    parser.add_argument("--match-names", action="store_true",
+                        help="find the composers in the track names (tracks processed without a composer folder)")
+    parser.add_argument("--materialized", action="store_true",
+                        help="read the feature and interval counts of aggregates.py (Q2, Q3 and Q7)")
+    parser.add_argument("--output", help="csv file for the results (default: print them)")
+    args = parser.parse_args()
+
+    print(QUERIES[args.query][0])
+    results = compare_composers(args.query, args.composers, args.meter_class, args.match_names, args.materialized)
+    if args.output:
+        results.to_csv(args.output, index=False)
+    else:
+        print(results.to_string(index=False))
@@ -0,0 +1,171 @@
+import numpy as np
+
+
+# streaming standardization of the valence and arousal values: running mean and variance (Welford) that are
+# updated value by value or merged from other running statistics (Chan et al.), so the statistics of a piece,
+# a composer or the whole corpus are kept without keeping their values
+
+class RunningStats:
+    """
+    running count, mean and sum of squared differences from the mean of a stream of values
+    """
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        """
+        function that adds the values of other running statistics to these
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    def remove(self, other):
+        """
+        function that removes the values of other running statistics that were merged into these
+        """
+        count = self.count - other.count
+        if count <= 0:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.mean * self.count - other.mean * other.count) / count
+        delta = other.mean - mean
+        self.m2 = max(self.m2 - other.m2 - delta * delta * count * other.count / self.count, 0.0)
+        self.mean = mean
+        self.count = count
+
+    def std(self):
+        """ population standard deviation, like numpy's std """
+        if self.count == 0:
+            return 0.0
+        return (self.m2 / self.count) ** 0.5
+
+    def standardize(self, values):
+        """
+        function that standardizes a list of values with the mean and the standard deviation (rounded like
+        parseXML.standarize), the values are 0 if all the values were the same
+        """
+        values = np.asarray(list(values), dtype=float)
+        std = self.std()
+        if std == 0:
+            return [0.0] * len(values)
+        return np.round((values - self.mean) / std, 3).tolist()
+
+    def __getstate__(self):
+        return self.count, self.mean, self.m2
+
+    def __setstate__(self, state):
+        self.count, self.mean, self.m2 = state
+
+
+class ValenceArousalStats:
+    """
+    running statistics of valence and arousal values
+    """
+    __slots__ = ('valence', 'arousal')
+
+    def __init__(self):
+        self.valence = RunningStats()
+        self.arousal = RunningStats()
+
+    def add(self, valence, arousal):
+        self.valence.add(valence)
+        self.arousal.add(arousal)
+
+    def merge(self, other):
+        self.valence.merge(other.valence)
+        self.arousal.merge(other.arousal)
+
+    def remove(self, other):
+        self.valence.remove(other.valence)
+        self.arousal.remove(other.arousal)
+
+    def standardize(self, valence, arousal):
+        """
+        function that standardizes lists of valence and arousal values, returns (valence, arousal) lists
+        """
+        return self.valence.standardize(valence), self.arousal.standardize(arousal)
+
+    def __getstate__(self):
+        return self.valence, self.arousal
+
+    def __setstate__(self, state):
+        self.valence, self.arousal = state
+
+
+class Standardizer:
+    """
+    running valence and arousal statistics of every composer and of the corpus,
+    scope is what the values of a piece are standardized with: 'piece', 'composer' or 'corpus'
+    """
+    SCOPES = ('piece', 'composer', 'corpus')
+
+    def __init__(self, scope='piece'):
+        if scope not in self.SCOPES:
+            raise ValueError("scope must be one of " + ", ".join(self.SCOPES))
+        self.scope = scope
+        self.composers = {}  # composer -> ValenceArousalStats
+        self.corpus = ValenceArousalStats()
+        self.pieces = {}  # title -> (composer, content hash, ValenceArousalStats)
+
+    def add_piece(self, composer, valence, arousal, title=None, content_hash=None):
+        """
+        function that adds the valence and arousal values of the meters of a piece to the statistics,
+        returns the statistics the piece is standardized with (so far for composer and corpus).
+        a piece with a title is counted once: it's skipped if it was added with the same content hash
+        and the values it was added with are replaced otherwise
+        """
+        piece = ValenceArousalStats()
+        for val, ar in zip(valence, arousal):
+            piece.add(val, ar)
+        if title is None:
+            self.add_stats(composer, piece)
+        elif title not in self.pieces or content_hash is None or self.pieces[title][1] != content_hash:
+            self.remove_piece(title)
+            self.add_stats(composer, piece)
+            self.pieces[title] = (composer, content_hash, piece)
+        if self.scope == 'composer':
+            return self.composers[composer]
+        if self.scope == 'corpus':
+            return self.corpus
+        return piece
+
+    def add_stats(self, composer, stats):
+        self.corpus.merge(stats)
+        self.composers.setdefault(composer, ValenceArousalStats()).merge(stats)
+
+    def remove_piece(self, title):
+        """
+        function that removes the values of a piece from the statistics (if it was added)
+        """
+        if title in self.pieces:
+            composer, _, piece = self.pieces.pop(title)
+            self.corpus.remove(piece)
+            self.composers[composer].remove(piece)
+
+    def merge(self, other):
+        """
+        function that adds the statistics of another standardizer (e.g. of another worker or an earlier run),
+        its pieces replace the ones with the same title
+        """
+        other_pieces = getattr(other, 'pieces', {})
+        for title in other_pieces:
+            self.remove_piece(title)
+        self.corpus.merge(other.corpus)
+        for composer, stats in other.composers.items():
+            self.composers.setdefault(composer, ValenceArousalStats()).merge(stats)
+        self.pieces.update(other_pieces)
@@ -0,0 +1,352 @@
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+
+# streaming MusicXML reader: yields one record per measure of the first part and clears every
+# finished measure, so memory stays flat no matter how long the score is.
+# the records only hold plain python values (strings, ints, tuples) - the mapping to ontology
+# classes is done in parseXML
+
+# change this when the records change, cached records of older versions are not used
+EXTRACTOR_VERSION = 2
+
+# a measure of the first part
+#   notes: melody notes (first voice, or the highest note of a chord)
+#   chords: list of (onset in quarter notes, tuple of midi values) for every chord
+#   rests: list of rest duration types
+#   dynamics: dynamic values like 'p', 'mf' (first and second part)
+#   articulations: music21 like articulation names like 'Staccato' (first and second part)
+#   directions: [('wedge', 'crescendo'), ('words', 'rit.'), ...] in score order
+#   time_signature: (beats, beat type) if it's defined in this measure
+#   tempos: bpm values of the metronome marks of the measure
+#   pitch_classes: duration (in quarter notes) of every pitch class in the measure (all the parts and staves)
+MeasureRecord = namedtuple('MeasureRecord', ['number', 'notes', 'chords', 'rests', 'dynamics', 'articulations',
+                                             'directions', 'time_signature', 'tempos', 'pitch_classes'])
+
+
+class StreamNote(namedtuple('StreamNote', ['midi', 'octave', 'type'])):
+    """
+    a note read from the xml, it has the attributes of music21 notes that the melody functions use:
+    note.octave, note.pitch (compared by midi value), note.pitch.midi and note.duration.type
+    """
+    __slots__ = ()
+
+    @property
+    def pitch(self):
+        return self
+
+    @property
+    def duration(self):
+        return self
+
+
+STEP_TO_PITCH_CLASS = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+# xml articulation tag -> music21 articulation class name
+ARTICULATION_NAMES = {
+    'accent': 'Accent',
+    'staccato': 'Staccato',
+    'tenuto': 'Tenuto',
+}
+
+# quarter length -> duration type, used when a note has no <type> element
+QUARTER_LENGTH_TYPES = [(4, 'whole'), (2, 'half'), (1, 'quarter'), (0.5, 'eighth'), (0.25, '16th'),
+                        (0.125, '32nd'), (0.0625, '64th')]
+
+
+
+def pitch_to_midi(pitch_elem):
+    """
+    function that converts a <pitch> element to its midi value and octave
+    """
+    step = pitch_elem.findtext('step')
+    octave = int(pitch_elem.findtext('octave'))
+    alter = pitch_elem.findtext('alter')
+    alter = round(float(alter)) if alter else 0
+    return (octave + 1) * 12 + STEP_TO_PITCH_CLASS[step] + alter, octave
+
+
+def duration_type(note_elem, quarter_length):
+    """
+    function that finds the duration type (e.g. quarter) of a note
+    """
+    type_text = note_elem.findtext('type')
+    if type_text:
+        return type_text
+    return quarter_length_type(quarter_length)
+
+
+def quarter_length_type(quarter_length):
+    """
+    function that finds the duration type of a quarter length (the longest type that fits in it)
+    """
+    for length, name in QUARTER_LENGTH_TYPES:
+        if quarter_length >= length:
+            return name
+    return 'zero'
+
+
+def read_time_signature(attributes_elem):
+    time_elem = attributes_elem.find('time')
+    if time_elem is not None and time_elem.find('beats') is not None:
+        return int(time_elem.findtext('beats')), int(time_elem.findtext('beat-type'))
+    return None
+
+
+def read_directions(direction_elem, directions, dynamics, tempos):
+    """
+    function that reads wedges, words, dynamics and tempo marks of a <direction> element
+    """
+    for direction_type in direction_elem.findall('direction-type'):
+        for child in direction_type:
+            if child.tag == 'wedge':
+                directions.append(('wedge', child.attrib.get('type', '')))
+            elif child.tag == 'words':
+                directions.append(('words', child.text))
+            elif child.tag == 'dynamics':
+                for dyn in child:
+                    dynamics.append(dyn.tag)
+            elif child.tag == 'metronome':
+                per_minute = child.findtext('per-minute')
+                if per_minute:
+                    try:
+                        tempos.append(float(per_minute))
+                    except ValueError:
+                        pass
+    sound = direction_elem.find('sound')
+    if sound is not None and sound.get('tempo') and not tempos:
+        tempos.append(float(sound.get('tempo')))
+
+
+def read_note_marks(note_elem, dynamics, articulations):
+    """
+    function that reads the articulations and dynamics written inside the <notations> of a note
+    """
+    for notations in note_elem.findall('notations'):
+        for arts in notations.findall('articulations'):
+            for art in arts:
+                if art.tag in ARTICULATION_NAMES:
+                    articulations.append(ARTICULATION_NAMES[art.tag])
+        for dyns in notations.findall('dynamics'):
+            for dyn in dyns:
+                dynamics.append(dyn.tag)
+
+
+def read_measure(measure, divisions, melody_staff, secondary_staff):
+    """
+    function that reads a <measure> element of a part
+
+    returns the features of the melody staff (with the pitch classes of every staff) and the dynamics and
+    articulations of the secondary staff
+    """
+    notes = []  # (voice, StreamNote) before the voice filter
+    chords = []
+    rests = []
+    dynamics = []
+    articulations = []
+    directions = []
+    tempos = []
+    time_signature = None
+    pitch_classes = [0.0] * 12
+    secondary_dynamics = []
+    secondary_articulations = []
+
+    position = 0  # in divisions
+    last_onset = 0
+    current_chord = None  # [onset, voice, [StreamNote, ...]]
+
+    def close_chord():
+        if current_chord is not None and len(current_chord[2]) > 1:
+            chord_notes = current_chord[2]
+            chords.append((current_chord[0] / divisions, tuple(n.midi for n in chord_notes)))
+            notes.append((current_chord[1], max(chord_notes)))
+        elif current_chord is not None:
+            notes.append((current_chord[1], current_chord[2][0]))
+
+    for elem in measure:
+        if elem.tag == 'attributes':
+            if elem.findtext('divisions'):
+                divisions = int(float(elem.findtext('divisions')))
+            time_signature = read_time_signature(elem) or time_signature
+        elif elem.tag == 'direction':
+            # wedges and words of every staff belong to the measure, dynamics to the staff
+            staff = elem.findtext('staff') or '1'
+            read_directions(elem, directions, secondary_dynamics if staff == secondary_staff else dynamics, tempos)
+        elif elem.tag == 'sound' and elem.get('tempo') and not tempos:
+            tempos.append(float(elem.get('tempo')))
+        elif elem.tag == 'backup':
+            position -= int(float(elem.findtext('duration', '0')))
+        elif elem.tag == 'forward':
+            position += int(float(elem.findtext('duration', '0')))
+        elif elem.tag == 'note':
+            duration = int(float(elem.findtext('duration', '0')))
+            is_chord_note = elem.find('chord') is not None
+            onset = last_onset if is_chord_note else position
+            if not is_chord_note:
+                last_onset = position
+                position += duration
+            staff = elem.findtext('staff') or '1'
+            quarter_length = duration / divisions
+            # the pitch classes of every staff (music21 reads the staves as parts)
+            pitch_elem = elem.find('pitch')
+            if pitch_elem is not None:
+                midi, octave = pitch_to_midi(pitch_elem)
+                pitch_classes[midi % 12] += quarter_length
+
+            if staff == secondary_staff:
+                read_note_marks(elem, secondary_dynamics, secondary_articulations)
+                continue
+            if staff != melody_staff:
+                continue
+
+            read_note_marks(elem, dynamics, articulations)
+            if elem.find('rest') is not None:
+                close_chord()
+                current_chord = None
+                rests.append(duration_type(elem, quarter_length))
+                continue
+            if pitch_elem is None:  # unpitched notes
+                continue
+            note = StreamNote(midi, octave, duration_type(elem, quarter_length))
+            if is_chord_note and current_chord is not None:
+                current_chord[2].append(note)
+            else:
+                close_chord()
+                current_chord = [onset, elem.findtext('voice'), [note]]
+    close_chord()
+
+    # like get_measure_notes: if the measure has more than one voice, only the first voice is the melody
+    voices = set(voice for voice, _ in notes)
+    if len(voices) > 1:
+        melody = [n for voice, n in notes if voice == '1' or voice is None]
+    else:
+        melody = [n for _, n in notes]
+
+    record = (melody, chords, rests, dynamics, articulations, directions, time_signature, tempos, pitch_classes)
+    secondary = (secondary_dynamics, secondary_articulations)
+    return record, secondary
+
+
+def read_staves(measure):
+    attributes = measure.find('attributes')
+    if attributes is not None and attributes.findtext('staves'):
+        return int(attributes.findtext('staves'))
+    return 1
+
+
+def iter_part_measures(xml_file, part_number):
+    """
+    generator that yields every (measure element, divisions, staves) of the part in position part_number
+    """
+    for _, measure, divisions, staves in iter_parts_measures(xml_file, part_number, part_number + 1):
+        yield measure, divisions, staves
+
+
+def iter_parts_measures(xml_file, first_part=0, last_part=None):
+    """
+    generator that yields every (part position, measure element, divisions, staves) of the parts in the positions
+    first_part to last_part (excluded, None for all the parts), in file order.
+    measures of every part are removed from the tree as soon as they end (or after they are consumed)
+    """
+    part_index = -1
+    current_part = None
+    divisions = 1
+    staves = None
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'part':
+                part_index += 1
+                current_part = elem
+                divisions = 1
+                staves = None
+            elif elem.tag == 'score-timewise':
+                raise ValueError(f"{xml_file}: only partwise MusicXML files can be streamed")
+            continue
+        if elem.tag == 'measure':
+            if part_index >= first_part and (last_part is None or part_index < last_part):
+                if staves is None:
+                    staves = read_staves(elem)
+                yield part_index, elem, divisions, staves
+                attributes = elem.find('attributes')
+                if attributes is not None and attributes.findtext('divisions'):
+                    divisions = int(float(attributes.findtext('divisions')))
+            # clear the finished measure
+            current_part.remove(elem)
+        elif elem.tag == 'part':
+            elem.clear()
+            if last_part is not None and part_index + 1 >= last_part:
+                return
+
+
+def count_parts(xml_file):
+    """
+    function that counts the <score-part> elements of the part list without reading the parts
+    """
+    for event, elem in ET.iterparse(xml_file, events=('end',)):
+        if elem.tag == 'part-list':
+            return len(elem.findall('score-part'))
+    return 0
+
+
+def read_other_parts(xml_file, num_of_parts):
+    """
+    function that reads the pitch classes of every measure of the parts after the first one (added up by measure
+    number), and the dynamics and articulations of the second part if the score has 2 parts
+
+    the result is small (no notes are kept), it's used to complete the records of the first part
+    """
+    extras = {}
+    read_parts = set()  # (part, measure number), like music21 only the first measure with a number is read
+    # like get_measure_notes, the dynamics and articulations of a second part
+    marks = num_of_parts == 2
+    for part, measure, divisions, staves in iter_parts_measures(xml_file, 1):
+        if part == 1 and staves > 1:
+            # music21 splits this part in more parts, so the score has more than 2 parts
+            marks = False
+        number = measure.get('number')
+        if (part, number) in read_parts:
+            continue
+        read_parts.add((part, number))
+        (_, _, _, dynamics, articulations, _, _, _, pitch_classes), _ = read_measure(measure, divisions, '1', None)
+        if not (marks and part == 1):
+            dynamics, articulations = [], []
+        if number in extras:
+            extra_dynamics, extra_articulations, extra_pitch_classes = extras[number]
+            extras[number] = (extra_dynamics + dynamics, extra_articulations + articulations,
+                              [a + b for a, b in zip(extra_pitch_classes, pitch_classes)])
+        else:
+            extras[number] = (dynamics, articulations, pitch_classes)
+    return extras
+
+
+def iter_measures(xml_file):
+    """
+    generator that reads a partwise MusicXML file measure by measure and yields a MeasureRecord for every measure
+    of the first part
+
+    like get_measure_notes, the second part (the second staff of a piano part or a second part) is only used
+    for dynamics and articulations. the pitch classes are the ones of all the parts, the other parts are read
+    before the first one
+    """
+    num_of_parts = count_parts(xml_file)
+    extras = {}
+    if num_of_parts > 1:
+        extras = read_other_parts(xml_file, num_of_parts)
+
+    secondary_staff = None
+    for measure, divisions, staves in iter_part_measures(xml_file, 0):
+        if secondary_staff is None:
+            # a single part with 2 staves is read by music21 as 2 parts
+            secondary_staff = '2' if staves == 2 and num_of_parts == 1 else ''
+        record, (secondary_dynamics, secondary_articulations) = read_measure(measure, divisions, '1',
+                                                                             secondary_staff)
+        notes, chords, rests, dynamics, articulations, directions, time_signature, tempos, pitch_classes = record
+        number = measure.get('number')
+        if number in extras:
+            other_dynamics, other_articulations, other_pitch_classes = extras.pop(number)
+            secondary_dynamics = secondary_dynamics + other_dynamics
+            secondary_articulations = secondary_articulations + other_articulations
+            pitch_classes = [a + b for a, b in zip(pitch_classes, other_pitch_classes)]
+        yield MeasureRecord(number, notes, chords, rests, dynamics + secondary_dynamics,
+                            articulations + secondary_articulations, directions, time_signature, tempos,
+                            pitch_classes)
@@ -0,0 +1,134 @@
+from array import array
+import numpy as np
+import MusicEmotionOntology as meo
+from meter_classes import VALENCE_CLASSIFIER, AROUSAL_CLASSIFIER
+
+
+# index of the sequences of the valence and arousal meter classes of the tracks, to find meters of a class followed
+# by a meter of another class (Q6: VeryPositiveValenceMeter then LowNegativeValenceMeter) without going through
+# hasNextMeter and the transitive isFollowedByMeter.
+# the meters of all the tracks are in flat arrays: a bit mask of the classes of every meter and the position of
+# the first meter of every track, a query is a few numpy passes over the masks (linear in the number of meters)
+
+# bit of every valence and arousal meter class
+METER_CLASSES = sorted({cls.name for cls in VALENCE_CLASSIFIER.bin_classes + AROUSAL_CLASSIFIER.bin_classes if cls})
+CLASS_BITS = {name: 1 << bit for bit, name in enumerate(METER_CLASSES)}
+
+
+class TransitionIndex:
+    """
+    the meter class sequences of the tracks, one add_track call per track
+    """
+
+    def __init__(self):
+        self.tracks = []  # name of every track
+        self.hashes = []  # content hash of every track (None if it's unknown)
+        self.positions = {}  # name -> position of the track
+        self.starts = array('l', [0])  # position of the first meter of every track (and the end of the last one)
+        self.numbers = array('l')  # meter number of every meter
+        self.masks = array('H')  # class bits of every meter
+
+    def add_track(self, name, numbers, meter_classes, content_hash=None):
+        """
+        function that adds the meters of a track in order: their numbers and the meter classes of every meter
+        (e.g. its valence class and its arousal class, None for no class).
+        a track that is already in the index is skipped if it has the same content hash and replaced otherwise
+        """
+        masks = [sum(CLASS_BITS[cls.name] for cls in set(classes) if cls is not None) for classes in meter_classes]
+        self.add_masks(name, list(numbers), masks, content_hash)
+
+    def add_masks(self, name, numbers, masks, content_hash=None):
+        """
+        function that adds the meter numbers and the class bits of the meters of a track (see add_track)
+        """
+        if name in self.positions:
+            if content_hash is not None and self.hashes[self.positions[name]] == content_hash:
+                return
+            self.remove_track(name)
+        self.numbers.extend(numbers)
+        self.masks.extend(masks)
+        self.positions[name] = len(self.tracks)
+        self.tracks.append(name)
+        self.hashes.append(content_hash)
+        self.starts.append(len(self.masks))
+
+    def remove_track(self, name):
+        """
+        function that removes the meters of a track
+        """
+        i = self.positions.pop(name)
+        start, end = self.starts[i], self.starts[i + 1]
+        del self.numbers[start:end]
+        del self.masks[start:end]
+        del self.tracks[i]
+        del self.hashes[i]
+        self.starts = array('l', list(self.starts[:i + 1]) + [s - (end - start) for s in self.starts[i + 2:]])
+        for track in self.tracks[i:]:
+            self.positions[track] -= 1
+
+    def merge(self, other):
+        """
+        function that adds the tracks of another index (e.g. of an earlier run), its tracks replace the ones
+        with the same name
+        """
+        hashes = getattr(other, 'hashes', [None] * len(other.tracks))
+        for i, (name, content_hash) in enumerate(zip(other.tracks, hashes)):
+            start, end = other.starts[i], other.starts[i + 1]
+            self.add_masks(name, other.numbers[start:end], other.masks[start:end], content_hash)
+
+    def followed_by(self, first, second, within=1):
+        """
+        function that finds the meters of class second that follow a meter of class first in the same track
+        by at most `within` meters, returns (track name, meter number of first, meter number of second) with
+        the closest meter of class first before every meter of class second
+        """
+        masks = np.array(self.masks, dtype=np.int64)
+        starts = np.array(self.starts, dtype=np.int64)
+        positions = np.arange(len(masks))
+        track_of = np.repeat(np.arange(len(self.tracks)), np.diff(starts))
+
+        # position of the last meter of class first before every meter (-1 if there is none)
+        is_first = (masks & CLASS_BITS[first]) != 0
+        last_first = np.maximum.accumulate(np.where(is_first, positions, -1))
+        previous = np.concatenate([[-1], last_first[:-1]]).astype(np.int64)
+
+        found = ((masks & CLASS_BITS[second]) != 0) & (previous >= starts[track_of]) & (positions - previous <= within)
+        return [(self.tracks[track_of[j]], self.numbers[previous[j]], self.numbers[j]) for j in np.flatnonzero(found)]
+
+
+def index_world(world=meo.default_world):
+    """
+    function that creates the index of the classified meters of the tracks of a (persistent) world
+    """
+    index = TransitionIndex()
+    for track in world.search(type=meo.Track):
+        # the meters are tracks too, and the instance of create_instances has no meters
+        if isinstance(track, meo.Meter) or not track.trackHasMeter:
+            continue
+        meters = sorted(track.trackHasMeter, key=lambda meter: int(meter.name.rsplit("_Meter", 1)[1]))
+        index.add_track(track.name, [int(meter.name.rsplit("_Meter", 1)[1]) for meter in meters],
+                        [[cls for cls in meter.is_a if getattr(cls, 'name', None) in CLASS_BITS] for meter in meters],
+                        track.trackHasContentHash)
+    return index
+
+
+# python transitions.py index.pickle VeryPositiveValenceMeter LowNegativeValenceMeter --within 2
+if __name__ == "__main__":
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(description="Find meters of a class followed by meters of another class")
+    parser.add_argument("index", help="index file of parseXML.py --transitions, or '-' for the tracks of MEO_WORLD")
+    parser.add_argument("first", choices=METER_CLASSES)
+    parser.add_argument("second", choices=METER_CLASSES)
+    parser.add_argument("--within", type=int, default=1, help="maximum number of meters between them")
+    args = parser.parse_args()
+
+    if args.index == '-':
+        index = index_world()
+    else:
+        with open(args.index, 'rb') as fp:
+            index = pickle.load(fp)
+    print("track,meter1,meter2")
+    for row in index.followed_by(args.first, args.second, args.within):
+        print(*row, sep=",")
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# the modules of src are flat modules that import each other by name
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+XML_FILES = os.path.join(os.path.dirname(SRC), "xmlFiles")
+
+
+@pytest.fixture(scope="session")
+def instances():
+    """ the instances of create_instances, shared by parseXML like in __main__ """
+    import MusicEmotionOntology as meo
+    import parseXML
+
+    parseXML.instances = meo.create_instances()
+    return parseXML.instances
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    """ a working directory like the one of parseXML.py: xmlFiles and Plots """
+    os.symlink(XML_FILES, tmp_path / "xmlFiles")
+    (tmp_path / "Plots").mkdir()
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(cwd)
+
+
+def track_summary(extracted):
+    """ the extracted features of a track as plain values, to compare 2 ways of extracting it """
+    return (extracted['title'], extracted['mode'], extracted['tempo'], extracted['bpm'],
+            [(features.number, list(features)) for features in extracted['meters']])
@@ -0,0 +1,37 @@
+import aggregates
+import parseXML
+from meter_features import MeterFeatures
+
+COMPOSER = 'AggregatesComposer'
+
+
+def meter(number, intervals):
+    features = MeterFeatures(number)
+    features.add('hasDynamics', 'Forte')
+    for interval, duration in intervals:
+        features.add_interval(interval, duration)
+    return features
+
+
+def test_counts_of_a_track_are_added_and_removed(instances):
+    extracted = {'title': 'AggregatedTrack', 'composer': COMPOSER, 'work': None, 'mode': 'MajorMode',
+                 'tempo': 'Andante', 'bpm': 96,
+                 'meters': [meter(1, [('MajorSecondInterval', 'quarter'), ('MajorSecondInterval', 'quarter')]),
+                            meter(2, [('MajorSecondInterval', 'eighth'), ('MinorThirdInterval', None)])]}
+    track, meter_list = parseXML.add_track(extracted)
+    aggregates.add_track(extracted, ['VeryPositiveValenceMeter', ''])
+
+    features = dict(aggregates.composer_features(COMPOSER, min_count=1).values.tolist())
+    # the names of the query results, an interval is counted once in a meter
+    assert features == {'forte_instance': 2, 'majormode_instance': 2, 'andante_instance': 2,
+                        'majorsecondinterval_instance': 2, 'minorthirdinterval_instance': 1}
+    intervals = aggregates.composer_intervals(COMPOSER)
+    assert intervals.values.tolist() == [['majorsecondinterval_instance', 2, 3],
+                                         ['minorthirdinterval_instance', 1, 1]]
+    very_positive = dict(aggregates.meter_class_features(COMPOSER).values.tolist())
+    assert very_positive == {'forte_instance': 1, 'majormode_instance': 1, 'andante_instance': 1,
+                             'majorsecondinterval_instance': 1}
+
+    aggregates.remove_track(track)
+    assert aggregates.composer_features(COMPOSER, min_count=1).empty
+    assert aggregates.composer_intervals(COMPOSER).empty
@@ -0,0 +1,32 @@
+import MusicEmotionOntology as meo
+import parseXML
+from meter_features import MeterFeatures
+
+
+def test_repeated_features_are_written_once(instances):
+    # 2 staccato notes and the same dynamic on both staves give the same triple twice
+    features = MeterFeatures(1)
+    features.add('hasArticulation', 'Staccato')
+    features.add('hasArticulation', 'Staccato')
+    features.add('hasDynamics', 'Forte')
+    features.add('hasDynamics', 'Forte')
+    extracted = {'title': 'RepeatedArticulation', 'mode': 'MajorMode', 'tempo': 'Andante', 'bpm': 96,
+                 'meters': [features]}
+
+    track, meter_list = parseXML.add_track(extracted)
+
+    assert meter_list[0].hasArticulation == [instances[meo.Staccato]]
+    assert meter_list[0].hasDynamics == [instances[meo.Forte]]
+
+
+def test_triples_already_in_the_world_are_ignored(instances):
+    with meo.onto:
+        meter = meo.Meter('AlreadyAppended_Meter1')
+    meter.hasArticulation.append(instances[meo.Accent])
+
+    meo.bulk_add_triples([(meter, meo.hasArticulation, instances[meo.Accent])])
+    meo.bulk_add_types([(meter, meo.VeryPositiveValenceMeter), (meter, meo.VeryPositiveValenceMeter)])
+    meo.bulk_add_types([(meter, meo.VeryPositiveValenceMeter)])
+
+    assert meter.hasArticulation == [instances[meo.Accent]]
+    assert meter.is_a.count(meo.VeryPositiveValenceMeter) == 1
@@ -0,0 +1,97 @@
+import contextlib
+import io
+
+import pytest
+
+import parseXML
+from chord_table import CHORD_TABLE, chord_change_rate, classify_chords, pitch_class_mask
+
+C_MAJOR = (60, 64, 67)
+A_MINOR = (57, 60, 64)
+
+
+@pytest.mark.parametrize("midis, name", [
+    (C_MAJOR, 'MajorChord'),
+    ((64, 67, 72), 'MajorChord'),  # first inversion
+    ((55, 60, 64, 67, 76), 'MajorChord'),  # second inversion, doubled notes
+    (A_MINOR, 'MinorChord'),
+    ((60, 65, 67), 'SuspendedFourthChord'),
+    ((59, 62, 65), 'DiminishedChord'),
+    ((62, 65, 68, 71), 'DiminishedChord'),
+    ((60, 64, 67, 71), 'MajorSeventhChord'),
+    ((60, 64, 71), 'MajorSeventhChord'),  # without the fifth
+    ((57, 60, 64, 67), 'MinorSeventhChord'),
+    ((60, 64, 70, 74), 'NinthChord'),  # without the fifth
+    ((64, 70, 72, 73), 'SeventhMinorNinthChord'),  # without the fifth, third in the bass
+    ((60, 62, 64, 67), 'AddedNinthChord'),
+    ((60, 61, 62), None),
+    ((55, 59, 62, 65), None),  # no template for the dominant seventh
+])
+def test_chord_table(midis, name):
+    assert CHORD_TABLE[pitch_class_mask(midis)] == name
+
+
+def test_classify_chords():
+    # the chords are sorted by onset, a chord type is listed once
+    chord_types, changes, last = classify_chords([(2.0, A_MINOR), (0.0, C_MAJOR), (3.0, (48, 52, 55))])
+    assert chord_types == ['MajorChord', 'MinorChord']
+    assert changes == 3
+    assert last == pitch_class_mask(C_MAJOR)
+
+    # the last chord of the meter before is not a change
+    assert classify_chords([(0.0, (48, 55, 64))], last) == (['MajorChord'], 0, last)
+    assert classify_chords([(0.0, A_MINOR)], last)[1] == 1
+
+
+@pytest.mark.parametrize("changes, rate", [(0, 'SlowChordChangeRate'), (1, 'MediumChordChangeRate'),
+                                           (2, 'MediumChordChangeRate'), (3, 'FastChordChangeRate'),
+                                           (8, 'FastChordChangeRate')])
+def test_chord_change_rate(changes, rate):
+    assert chord_change_rate(changes) == rate
+
+
+STEPS = {0: 'C', 2: 'D', 4: 'E', 5: 'F', 7: 'G', 9: 'A', 11: 'B'}
+TYPES = {1: 'quarter', 2: 'half', 4: 'whole'}
+
+
+def chord(midis, duration):
+    notes = ""
+    for position, midi in enumerate(midis):
+        notes += ("<note>" + ("<chord/>" if position else "") +
+                  f"<pitch><step>{STEPS[midi % 12]}</step><octave>{midi // 12 - 1}</octave></pitch>"
+                  f"<duration>{duration}</duration><type>{TYPES[duration]}</type></note>")
+    return notes
+
+
+@pytest.fixture
+def chords_file(tmp_path):
+    """ 2 chords, the second one held in the next meter, and a chord on every beat """
+    measures = [chord(C_MAJOR, 2) + chord(A_MINOR, 2),
+                chord(A_MINOR, 4),
+                chord(C_MAJOR, 1) + chord((53, 57, 60), 1) + chord((55, 59, 62), 1) + chord(C_MAJOR, 1)]
+    xml = ('<?xml version="1.0" encoding="UTF-8"?><score-partwise version="3.1"><part-list>'
+           '<score-part id="P1"><part-name>Piano</part-name></score-part></part-list><part id="P1">')
+    for number, notes in enumerate(measures, 1):
+        xml += f'<measure number="{number}">'
+        if number == 1:
+            xml += "<attributes><divisions>1</divisions><time><beats>4</beats><beat-type>4</beat-type></time></attributes>"
+        xml += notes + "</measure>"
+    path = tmp_path / "Chords.xml"
+    path.write_text(xml + "</part></score-partwise>")
+    return str(path)
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_harmony_features_of_the_meters(chords_file, stream):
+    with contextlib.redirect_stdout(io.StringIO()):
+        extracted = parseXML.extract_track(chords_file, stream, harmony=True)
+
+    harmony = [sorted(name for _, name in features.feature_items() if 'Chord' in name)
+               for features in extracted['meters']]
+    assert harmony == [['MajorChord', 'MediumChordChangeRate', 'MinorChord'],
+                       ['MinorChord', 'SlowChordChangeRate'],
+                       ['FastChordChangeRate', 'MajorChord']]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        extracted = parseXML.extract_track(chords_file, stream)
+    assert not any('Chord' in name for features in extracted['meters'] for _, name in features.feature_items())
@@ -0,0 +1,27 @@
+import numpy as np
+
+import key_finder
+import parseXML
+import MusicEmotionOntology as meo
+
+C_MAJOR_SCALE = [2, 0, 1, 0, 1, 1, 0, 2, 0, 1, 0, 1]  # quarter notes of c d e f g a b, c and g twice
+A_MINOR_CHORDS = [1, 0, 0, 0, 2, 0, 0, 0, 1, 3, 0, 0]  # a minor and e chords
+
+
+def test_histogram_key():
+    assert key_finder.histogram_key(C_MAJOR_SCALE) == 0
+    assert key_finder.histogram_key(A_MINOR_CHORDS) == 12 + 9
+    assert key_finder.histogram_key([0] * 12) == -1
+
+
+def test_mode_from_pitch_classes():
+    assert parseXML.mode_from_pitch_classes(C_MAJOR_SCALE) is meo.MajorMode
+    assert parseXML.mode_from_pitch_classes(A_MINOR_CHORDS) is meo.MinorMode
+    assert parseXML.mode_from_pitch_classes([0] * 12) is None
+
+
+def test_meter_keys_fill_the_meters_without_notes():
+    histograms = [[0] * 12, C_MAJOR_SCALE, [0] * 12, A_MINOR_CHORDS]
+    keys = key_finder.meter_keys(histograms, window=1)
+    assert keys.tolist() == [0, 0, 0, 21]
+    assert key_finder.meter_keys(np.zeros((3, 12))).tolist() == [-1, -1, -1]
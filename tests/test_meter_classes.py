@@ -0,0 +1,25 @@
+import numpy as np
+
+import MusicEmotionOntology as meo
+import meter_classes
+from meter_classes import VALENCE_CLASSIFIER, AROUSAL_CLASSIFIER
+
+
+def test_ranges_of_the_classes():
+    for classifier in (VALENCE_CLASSIFIER, AROUSAL_CLASSIFIER):
+        ranges = meter_classes.class_ranges(classifier.prop)
+        assert ranges
+        for cls, low, high in ranges:
+            inside = [value for value in (low, np.nextafter(high, -np.inf)) if np.isfinite(value)]
+            assert classifier.classify(inside) == [cls] * len(inside)
+
+
+def test_classify_meters(instances):
+    with meo.onto:
+        meters = [meo.Meter('Classified_Meter' + str(number)) for number in (1, 2)]
+    valence_classes, arousal_classes = meter_classes.classify_meters(meters, [4.85, 0.2], [0.0, 0.0])
+
+    assert valence_classes == [meo.VeryPositiveValenceMeter, meo.LowNegativeValenceMeter]
+    for meter, valence_class, arousal_class in zip(meters, valence_classes, arousal_classes):
+        assert valence_class in meter.is_a
+        assert arousal_class is None or arousal_class in meter.is_a
@@ -0,0 +1,27 @@
+import MusicEmotionOntology as meo
+import parseXML
+
+
+def link_rows():
+    storids = [prop.storid for prop in parseXML.METER_LINK_PROPERTIES]
+    return meo.default_world.graph.db.execute(
+        "SELECT s, p, o FROM objs WHERE p IN (?,?,?) ORDER BY s, p, o", storids).fetchall()
+
+
+def test_meter_links_are_kept_out_of_the_reasoner(instances):
+    with meo.onto:
+        meters = [meo.Meter('LinkedTrack_Meter' + str(number)) for number in range(1, 4)]
+    meo.bulk_add_triples(parseXML.next_meter_triples(meters))
+    before = link_rows()
+    assert len([row for row in before if row[0] in {meter.storid for meter in meters}]) == 4
+
+    with parseXML.meter_links_detached():
+        # what the reasoner would read
+        assert link_rows() == []
+        assert not list(meo.default_world.sparql("""
+            PREFIX meo: <http://www.semanticweb.org/musicEmotionOntology#>
+            SELECT ?m WHERE { ?m meo:hasNextMeter ?n }"""))
+
+    assert link_rows() == before
+    assert meters[0].hasNextMeter == meters[1]
+    assert meters[2].followsMeter == [meters[1]]
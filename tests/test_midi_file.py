@@ -0,0 +1,114 @@
+import contextlib
+import io
+
+import pytest
+
+import MusicEmotionOntology as meo
+import midi_file
+import parseXML
+from midi_stream import MeasureSegmenter, score_events
+from score_engine import ScoringEngine
+
+TICKS_PER_BEAT = 480
+
+
+def variable_length(value):
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(data)
+
+
+def write_midi(path, events):
+    """ a format 0 midi file of (tick, event bytes) events """
+    track = b''
+    tick = 0
+    for event_tick, event in sorted(events, key=lambda e: e[0]):
+        track += variable_length(event_tick - tick) + event
+        tick = event_tick
+    track += b'\x00\xff\x2f\x00'
+    header = (0).to_bytes(2, 'big') + (1).to_bytes(2, 'big') + TICKS_PER_BEAT.to_bytes(2, 'big')
+    path.write_bytes(b'MThd' + len(header).to_bytes(4, 'big') + header +
+                     b'MTrk' + len(track).to_bytes(4, 'big') + track)
+
+
+def note(beat, beats, midi, velocity=80, channel=0):
+    start, end = int(beat * TICKS_PER_BEAT), int((beat + beats) * TICKS_PER_BEAT)
+    return [(start, bytes([0x90 | channel, midi, velocity])), (end, bytes([0x80 | channel, midi, 0]))]
+
+
+@pytest.fixture
+def midi_path(tmp_path):
+    events = [(0, b'\xff\x51\x03' + (600000).to_bytes(3, 'big')),  # 100 bpm
+              (0, b'\xff\x58\x04\x03\x02\x18\x08')]  # 3/4
+    # a c major melody, a chord on the 2nd measure and a drum on every beat
+    for beat, midi in enumerate([60, 62, 64, 65, 67]):
+        events += note(beat, 1, midi)
+    events += note(5, 1, 64) + note(5, 1, 67) + note(5, 1, 72)
+    for beat in range(6):
+        events += note(beat, 0.5, 36, channel=midi_file.PERCUSSION_CHANNEL)
+    path = tmp_path / "Melody.mid"
+    write_midi(path, events)
+    return path
+
+
+def test_measure_records(midi_path):
+    records = list(midi_file.iter_measure_records(midi_path))
+
+    assert [record.number for record in records] == ['1', '2']
+    assert records[0].time_signature == (3, 4)
+    assert records[0].tempos == [pytest.approx(100)]
+    # the drums are skipped, the chord gives its highest note to the melody
+    assert [n.midi for n in records[0].notes] == [60, 62, 64]
+    assert [n.midi for n in records[1].notes] == [65, 67, 72]
+    assert records[1].chords == [(2.0, (64, 67, 72))]
+
+
+def test_file_reader_matches_the_live_segmenter(midi_path):
+    segmenter = MeasureSegmenter()
+    live = []
+    for beat, kind, values in midi_file.midi_file_events(midi_path):
+        live += segmenter.feed(beat, kind, values)
+    # like LiveScorer.flush
+    if segmenter.notes:
+        live.append(segmenter.close())
+
+    assert live == list(midi_file.iter_measure_records(midi_path))
+
+
+def test_midi_files_go_through_the_meter_pipeline(midi_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        extracted = parseXML.extract_track(midi_path)
+
+    assert extracted['title'] == 'Melody'
+    assert extracted['bpm'] == 100
+    assert extracted['mode'] == 'MajorMode'
+    assert [features.number for features in extracted['meters']] == [1, 2]
+
+
+def test_tempos_out_of_the_arousal_range_are_scored(corpus_dir, instances):
+    path = corpus_dir / "FastMelody.mid"
+    events = [(0, b'\xff\x51\x03' + (240000).to_bytes(3, 'big'))]  # 250 bpm
+    for beat, midi in enumerate([60, 62, 64, 65, 67, 69, 71, 72, 71, 69, 67, 65]):
+        events += note(beat, 1, midi)
+    write_midi(path, events)
+
+    triggers_lookup = meo.create_triggers_lookup()
+    with contextlib.redirect_stdout(io.StringIO()):
+        extracted = parseXML.extract_track(path)
+        track, meter_list = parseXML.add_track(extracted)
+        parseXML.reason_and_score([(extracted, track, meter_list)], triggers_lookup=triggers_lookup)
+
+    assert extracted['bpm'] == 250
+    # the arousal change of the fastest tempo of bpm_to_arousal
+    assert parseXML.calculate_tempo(meo.Prestissimo, 250) == parseXML.tempo_arousal(220) == 10
+    assert parseXML.calculate_tempo(meo.Grave, 25) == -10
+    assert len(track.trackHasAverageArousal) == 1
+
+    # the live scorer gives the same arousal change
+    engine = ScoringEngine(triggers_lookup, parseXML.EMOTION_WEIGHTS, parseXML.duration_weight)
+    with contextlib.redirect_stdout(io.StringIO()):
+        live = list(score_events(midi_file.midi_file_events(path), engine))
+    assert [number for number, *_ in live] == [1, 2, 3]
@@ -0,0 +1,84 @@
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SRC, XML_FILES
+
+
+def run(corpus_dir, *args, world=None):
+    env = dict(os.environ, MPLBACKEND="Agg")
+    env.pop("MEO_WORLD", None)
+    if world:
+        env["MEO_WORLD"] = str(corpus_dir / world)
+    return subprocess.run([sys.executable, os.path.join(SRC, "parseXML.py"), "--stream", "--fast", "--no-cache"] +
+                          list(args), cwd=corpus_dir, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+
+
+def load(corpus_dir, name):
+    with open(corpus_dir / name, 'rb') as fp:
+        return pickle.load(fp)
+
+
+def outputs(corpus_dir, stats, transitions):
+    standardizer = load(corpus_dir, stats)
+    index = load(corpus_dir, transitions)
+    corpus = standardizer.corpus
+    return ((corpus.valence.count, corpus.valence.mean, corpus.valence.std(), corpus.arousal.mean),
+            (index.tracks, list(index.starts), list(index.numbers), list(index.masks)))
+
+
+def test_jobs_give_the_same_results(corpus_dir):
+    run(corpus_dir, "--jobs", "1", "--stats", "stats1.pickle", "--transitions", "index1.pickle")
+    run(corpus_dir, "--jobs", "2", "--stats", "stats2.pickle", "--transitions", "index2.pickle")
+
+    (stats1, index1), (stats2, index2) = (outputs(corpus_dir, "stats1.pickle", "index1.pickle"),
+                                          outputs(corpus_dir, "stats2.pickle", "index2.pickle"))
+    assert stats2 == pytest.approx(stats1)
+    assert index2 == index1
+    assert len(index1[0]) == len(os.listdir(corpus_dir / "xmlFiles"))
+
+
+@pytest.mark.parametrize("world", [None, "corpus.sqlite3"])
+def test_processing_the_corpus_again_counts_the_tracks_once(corpus_dir, world):
+    run(corpus_dir, "--stats", "stats.pickle", "--transitions", "index.pickle", world=world)
+    first = outputs(corpus_dir, "stats.pickle", "index.pickle")
+    run(corpus_dir, "--stats", "stats.pickle", "--transitions", "index.pickle", world=world)
+    again = outputs(corpus_dir, "stats.pickle", "index.pickle")
+
+    assert again[0] == pytest.approx(first[0])
+    assert again[1] == first[1]
+
+
+def test_snapshot_gives_the_same_results(corpus_dir):
+    run(corpus_dir, "--stats", "stats1.pickle", "--transitions", "index1.pickle")
+    # the first run builds the snapshot, the second one reads it
+    run(corpus_dir, "--snapshot", "meo.snapshot")
+    assert os.path.exists(corpus_dir / "meo.snapshot")
+    run(corpus_dir, "--snapshot", "meo.snapshot", "--stats", "stats2.pickle", "--transitions", "index2.pickle")
+
+    (stats1, index1), (stats2, index2) = (outputs(corpus_dir, "stats1.pickle", "index1.pickle"),
+                                          outputs(corpus_dir, "stats2.pickle", "index2.pickle"))
+    assert stats2 == pytest.approx(stats1)
+    assert index2 == index1
+
+
+def test_files_with_the_same_name_are_other_tracks(tmp_path):
+    for composer, work, piece in (("Bach", "Fugue", "Aeolian"), ("Chopin", "Etude", "Dorian")):
+        os.makedirs(tmp_path / "xmlFiles" / composer / work)
+        shutil.copy(os.path.join(XML_FILES, piece + ".xml"), tmp_path / "xmlFiles" / composer / work / "score.xml")
+    (tmp_path / "Plots").mkdir()
+
+    output = run(tmp_path, "--stats", "stats.pickle", "--transitions", "index.pickle", world="corpus.sqlite3")
+    assert "2 new or changed files" in output
+    standardizer = load(tmp_path, "stats.pickle")
+    assert set(standardizer.pieces) == {"Bach__Fugue__score", "Chopin__Etude__score"}
+    assert set(standardizer.composers) == {"Bach", "Chopin"}
+    assert load(tmp_path, "index.pickle").tracks == ["Bach__Fugue__score", "Chopin__Etude__score"]
+
+    # the second run finds both tracks in the world
+    output = run(tmp_path, "--stats", "stats.pickle", "--transitions", "index.pickle", world="corpus.sqlite3")
+    assert "0 new or changed files" in output
@@ -0,0 +1,39 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+import parseXML
+from conftest import XML_FILES, track_summary
+from score_cache import ScoreCache
+
+
+def extract(xml_file, stream, cache):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parseXML.extract_track(xml_file, stream, cache)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_cached_tracks_are_the_same(tmp_path, stream):
+    xml_file = os.path.join(XML_FILES, "Ionian.xml")
+    cache = ScoreCache(str(tmp_path / "cache"))
+
+    uncached = extract(xml_file, stream, None)
+    written = extract(xml_file, stream, cache)
+    read = extract(xml_file, stream, cache)
+
+    assert track_summary(written) == track_summary(uncached)
+    assert track_summary(read) == track_summary(uncached)
+
+
+def test_cache_hit_does_not_index_the_file(tmp_path, monkeypatch):
+    xml_file = os.path.join(XML_FILES, "Ionian.xml")
+    cache = ScoreCache(str(tmp_path / "cache"))
+    uncached = extract(xml_file, False, cache)
+
+    def build_measure_index(xml_file):
+        raise AssertionError("the measure index should come from the cache")
+
+    monkeypatch.setattr(parseXML, "build_measure_index", build_measure_index)
+    assert track_summary(extract(xml_file, False, cache)) == track_summary(uncached)
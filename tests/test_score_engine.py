@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+import MusicEmotionOntology as meo
+import parseXML
+from conftest import XML_FILES
+from meter_features import MeterFeatures
+from score_engine import ScoringEngine
+
+
+@pytest.fixture(scope="module")
+def triggers_lookup():
+    return meo.create_triggers_lookup()
+
+
+def add_tracks(extracted_tracks):
+    tracks = []
+    for extracted in extracted_tracks:
+        track, meter_list = parseXML.add_track(extracted)
+        tracks.append((extracted, track, meter_list))
+    return tracks
+
+
+def assert_same_scores(tracks, triggers_lookup):
+    engine = ScoringEngine(triggers_lookup, parseXML.EMOTION_WEIGHTS, parseXML.duration_weight)
+    with contextlib.redirect_stdout(io.StringIO()):
+        vectorized = parseXML.score_meters_vectorized(tracks, engine)
+        for (extracted, track, meter_list), (avg_val, avg_ar) in zip(tracks, vectorized):
+            for j, meter in enumerate(meter_list):
+                arousal, valence = parseXML.calculate_valence_arousal_fast(meter, triggers_lookup, extracted['bpm'])
+                assert avg_val[j] == pytest.approx(valence), meter.name
+                assert avg_ar[j] == pytest.approx(arousal), meter.name
+
+
+def test_vectorized_scores_match_the_fast_scores(instances, triggers_lookup):
+    extracted_tracks = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in sorted(os.listdir(XML_FILES)):
+            extracted = parseXML.extract_track(os.path.join(XML_FILES, name), stream=True)
+            extracted['title'] = 'Parity' + extracted['title']
+            extracted_tracks.append(extracted)
+    assert_same_scores(add_tracks(extracted_tracks), triggers_lookup)
+
+
+def test_tempo_is_the_bpm_of_the_track(instances, triggers_lookup):
+    extracted_tracks = []
+    for title, bpm in (('SlowAndante', 76), ('FastAndante', 108)):
+        features = MeterFeatures(1)
+        features.add('hasDynamics', 'Piano')
+        extracted_tracks.append({'title': title, 'mode': 'MajorMode', 'tempo': 'Andante', 'bpm': bpm,
+                                 'meters': [features]})
+    tracks = add_tracks(extracted_tracks)
+    assert_same_scores(tracks, triggers_lookup)
+
+    (_, slow), (_, fast) = [(track, meter_list[0].hasArousalValue[0]) for _, track, meter_list in tracks]
+    assert fast - slow == pytest.approx(parseXML.bpm_to_arousal(108) - parseXML.bpm_to_arousal(76), abs=1e-3)
@@ -0,0 +1,43 @@
+import sqlite3
+import subprocess
+import sys
+
+from conftest import SRC
+
+# a new interpreter, the world of the tests already has the instances
+LOAD = """
+import sys
+sys.path.insert(0, {src!r})
+import MusicEmotionOntology as meo
+import snapshot
+
+instances, triggers_lookup = snapshot.load_snapshot({path!r})
+# the order of the triggers of a class isn't kept by owlready
+assert {{cls: set(effects) for cls, effects in triggers_lookup.items()}} == \
+    {{cls: set(effects) for cls, effects in meo.create_triggers_lookup().items()}}
+staccato = instances[meo.Staccato]
+assert staccato.name == 'staccato_instance' and staccato.is_a == [meo.Staccato]
+assert staccato.triggers == meo.Staccato.triggers
+# create_instances finds the same individuals
+created = meo.create_instances()
+assert len(created) == len(instances) and all(created[cls] is instances[cls] for cls in created)
+"""
+
+
+def test_snapshot_is_loaded_in_a_new_world(tmp_path):
+    import snapshot
+
+    path = str(tmp_path / "meo.snapshot")
+    snapshot.build_snapshot(path)
+    subprocess.run([sys.executable, "-c", LOAD.format(src=SRC, path=path)], check=True)
+
+
+def test_stale_snapshot_is_not_loaded(tmp_path):
+    import snapshot
+
+    path = str(tmp_path / "meo.snapshot")
+    assert snapshot.load_snapshot(path) is None
+    snapshot.build_snapshot(path)
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE snapshot_version SET version = 'older'")
+    assert snapshot.load_snapshot(path) is None
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+import MusicEmotionOntology as meo
+import parseXML
+import sparql_queries
+from conftest import XML_FILES
+
+COMPOSER = 'Anonymous'
+
+
+@pytest.fixture(scope="module")
+def corpus(instances, tmp_path_factory):
+    """ the tracks of xmlFiles scored without the reasoner (like --stream --fast), with a composer """
+    plots = tmp_path_factory.mktemp("corpus")
+    (plots / "Plots").mkdir()
+    cwd = os.getcwd()
+    os.chdir(plots)
+    tracks = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for xml_file in sorted(Path(XML_FILES).glob("*.xml")):
+                extracted = parseXML.extract_track(xml_file, stream=True)
+                extracted['composer'] = COMPOSER
+                extracted['work'] = None
+                track, meter_list = parseXML.add_track(extracted)
+                tracks.append((extracted, track, meter_list))
+            parseXML.reason_and_score(tracks, triggers_lookup=meo.create_triggers_lookup())
+    finally:
+        os.chdir(cwd)
+    return tracks
+
+
+@pytest.mark.parametrize("name", ['Q1', 'Q2', 'Q3', 'Q4', 'Q5', 'Q6', 'Q7'])
+def test_queries_return_rows(corpus, name):
+    assert len(sparql_queries.run_query(name)) > 0
+    # and with the composer of the tracks
+    assert len(sparql_queries.run_query(name, COMPOSER)) > 0
+
+
+def test_features_are_grouped_by_class(corpus):
+    q2 = sparql_queries.run_query('Q2')
+    # the intervals are counted by interval, not by interval count of a meter
+    assert 'majorsecondinterval_instance' in set(q2['mf'])
+    assert not any('_Meter' in str(mf) for mf in q2['mf'])
+    # the sub properties of hasMusicalFeature are found without the reasoner
+    assert 'andante_instance' in set(q2['mf'])
+
+
+def test_minor_very_positive_meters(corpus, instances):
+    # the very positive meters of the corpus are all in major mode, one is moved to minor mode
+    meter = next(meter for _, _, meter_list in corpus for meter in meter_list
+                 if meo.VeryPositiveValenceMeter in meter.is_a and meter.hasMode)
+    mode = meter.hasMode[0]
+    assert len(sparql_queries.run_query('Q8', COMPOSER)) == 0
+    meter.hasMode = [instances[meo.MinorMode]]
+    try:
+        q8 = sparql_queries.run_query('Q8', COMPOSER)
+        assert set(q8['commonMf']) >= {'minormode_instance'}
+        assert set(q8['meterCount']) == {1}
+    finally:
+        meter.hasMode = [mode]
+
+
+@pytest.mark.parametrize("name", ['Q2', 'Q3', 'Q7'])
+def test_materialized_counts_match_the_queries(corpus, name):
+    queried = sparql_queries.run_query(name, COMPOSER)
+    materialized = sparql_queries.run_query(name, COMPOSER, materialized=True)
+    columns = list(queried.columns[:2])
+    assert len(queried) > 0
+    assert dict(materialized[columns].values.tolist()) == dict(queried[columns].values.tolist())
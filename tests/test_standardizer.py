@@ -0,0 +1,58 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from standardizer import RunningStats, Standardizer
+
+
+def stats_of(values):
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+def test_merge_and_remove_match_numpy():
+    a, b = [1.0, 2.5, -3.0, 4.0], [0.5, 7.0, 2.0]
+    stats = stats_of(a)
+    stats.merge(stats_of(b))
+    assert stats.mean == pytest.approx(np.mean(a + b))
+    assert stats.std() == pytest.approx(np.std(a + b))
+
+    stats.remove(stats_of(b))
+    assert stats.count == len(a)
+    assert stats.mean == pytest.approx(np.mean(a))
+    assert stats.std() == pytest.approx(np.std(a))
+
+
+def test_pieces_are_counted_once():
+    standardizer = Standardizer('corpus')
+    standardizer.add_piece('Bach', [1.0, 2.0], [0.0, 1.0], 'Fugue', 'hash1')
+    standardizer.add_piece('Bach', [3.0, 5.0], [1.0, 1.0], 'Prelude', 'hash2')
+    # the same file again is skipped, a changed file replaces the values of the piece
+    standardizer.add_piece('Bach', [1.0, 2.0], [0.0, 1.0], 'Fugue', 'hash1')
+    standardizer.add_piece('Bach', [4.0, 6.0, 8.0], [2.0, 2.0, 0.0], 'Prelude', 'hash3')
+
+    valence = [1.0, 2.0, 4.0, 6.0, 8.0]
+    assert standardizer.corpus.valence.count == len(valence)
+    assert standardizer.corpus.valence.mean == pytest.approx(np.mean(valence))
+    assert standardizer.corpus.valence.std() == pytest.approx(np.std(valence))
+    assert standardizer.composers['Bach'].valence.count == len(valence)
+
+
+def test_merge_replaces_the_pieces_of_an_earlier_run():
+    earlier = Standardizer('corpus')
+    earlier.add_piece('Bach', [1.0, 2.0], [0.0, 1.0], 'Fugue', 'hash1')
+    earlier = pickle.loads(pickle.dumps(earlier))
+
+    standardizer = Standardizer('corpus')
+    standardizer.merge(earlier)
+    standardizer.add_piece('Bach', [1.0, 2.0], [0.0, 1.0], 'Fugue', 'hash1')
+    standardizer.add_piece('Bach', [3.0], [0.0], 'Prelude', 'hash2')
+    again = Standardizer('corpus')
+    again.merge(standardizer)
+    again.merge(standardizer)
+
+    assert again.corpus.valence.count == 3
+    assert again.corpus.valence.mean == pytest.approx(2.0)
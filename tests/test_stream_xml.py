@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+
+import pytest
+from music21 import converter
+
+import parseXML
+import stream_xml
+from conftest import XML_FILES, track_summary
+
+
+def extract(xml_file, stream):
+    with contextlib.redirect_stdout(io.StringIO()):
+        title, mode, tempo, bpm, meters = track_summary(parseXML.extract_track(xml_file, stream))
+    # the order of the features of a meter can differ between the 2 readers
+    return title, mode, tempo, bpm, [(number, sorted(map(str, features))) for number, features in meters]
+
+
+@pytest.mark.parametrize("name", sorted(os.listdir(XML_FILES)))
+def test_streaming_reader_matches_music21(name):
+    xml_file = os.path.join(XML_FILES, name)
+    assert extract(xml_file, True) == extract(xml_file, False)
+
+
+def note(step, octave, duration, chord=False):
+    return (("<chord/>" if chord else "") + f"<pitch><step>{step}</step><octave>{octave}</octave></pitch>"
+            f"<duration>{duration}</duration>")
+
+
+def part(part_id, measures, attributes="<divisions>1</divisions><time><beats>4</beats><beat-type>4</beat-type></time>"):
+    xml = f'<part id="{part_id}">'
+    for number, notes in enumerate(measures, 1):
+        xml += f'<measure number="{number}">'
+        if number == 1:
+            xml += f"<attributes>{attributes}</attributes>"
+        xml += "".join(f"<note>{n}</note>" for n in notes) + "</measure>"
+    return xml + "</part>"
+
+
+@pytest.fixture
+def three_parts(tmp_path):
+    """ a melody in c and 2 accompaniment parts in a minor, one with chords """
+    parts = [part("P1", [[note('C', 5, 1), note('D', 5, 1), note('E', 5, 1), note('G', 5, 1)],
+                         [note('C', 5, 2), note('E', 5, 2)]]),
+             part("P2", [[note('A', 3, 2), note('E', 3, 2)], [note('A', 3, 4)]]),
+             part("P3", [[note('A', 2, 4), note('C', 3, 4, chord=True), note('E', 3, 4, chord=True)],
+                         [note('A', 2, 2), note('B', 2, 2)]])]
+    score_parts = "".join(f'<score-part id="P{i}"><part-name>Part {i}</part-name></score-part>' for i in (1, 2, 3))
+    path = tmp_path / "ThreeParts.xml"
+    path.write_text('<?xml version="1.0" encoding="UTF-8"?><score-partwise version="3.1">'
+                    f"<part-list>{score_parts}</part-list>{''.join(parts)}</score-partwise>")
+    return str(path)
+
+
+def test_pitch_classes_of_every_part(three_parts):
+    score = converter.parse(three_parts)
+    part_measures = parseXML.index_score_measures(score)
+    records = list(stream_xml.iter_measures(three_parts))
+
+    assert [record.pitch_classes for record in records] == \
+           [parseXML.measure_pitch_classes(part_measures, int(record.number)) for record in records]
+    # the a of the 2 accompaniment parts
+    assert records[0].pitch_classes[9] == 6
+    # the mode is found from the pitch classes of all the parts, the melody alone is in c major
+    assert extract(three_parts, True)[1] == extract(three_parts, False)[1] == 'MinorMode'
@@ -0,0 +1,58 @@
+import MusicEmotionOntology as meo
+import meter_classes
+import parseXML
+from meter_features import MeterFeatures
+from transitions import TransitionIndex, index_world
+
+VP = meo.VeryPositiveValenceMeter
+LN = meo.LowNegativeValenceMeter
+
+
+def test_followed_by():
+    index = TransitionIndex()
+    index.add_track('A', [1, 2, 3], [[VP], [None], [LN]])
+    index.add_track('B', [1, 2], [[LN], [VP]])
+    index.add_track('C', [4, 5], [[VP], [LN]])
+
+    assert index.followed_by(VP.name, LN.name) == [('C', 4, 5)]
+    # not across the tracks B and C
+    assert index.followed_by(VP.name, LN.name, within=2) == [('A', 1, 3), ('C', 4, 5)]
+
+
+def test_tracks_are_added_once():
+    index = TransitionIndex()
+    index.add_track('A', [1, 2], [[VP], [LN]], 'hash1')
+    index.add_track('B', [1, 2], [[VP], [LN]], 'hash1')
+    # the same file again is skipped, a changed file replaces the track
+    index.add_track('A', [1, 2], [[VP], [LN]], 'hash1')
+    index.add_track('B', [1, 2], [[LN], [VP]], 'hash2')
+
+    assert index.tracks == ['A', 'B']
+    assert list(index.starts) == [0, 2, 4]
+    assert index.followed_by(VP.name, LN.name) == [('A', 1, 2)]
+
+    earlier = TransitionIndex()
+    earlier.add_track('A', [1, 2], [[VP], [LN]], 'hash1')
+    earlier.add_track('C', [1], [[VP]], 'hash3')
+    earlier.merge(index)
+    assert earlier.tracks == ['A', 'C', 'B']
+    assert len(earlier.masks) == 5
+
+
+def test_index_world_skips_the_track_instance(instances):
+    meters = []
+    for number in (1, 2):
+        features = MeterFeatures(number)
+        features.add('hasDynamics', 'Forte')
+        meters.append(features)
+    extracted = {'title': 'IndexedTrack', 'mode': 'MajorMode', 'tempo': 'Andante', 'bpm': 96, 'meters': meters}
+    track, meter_list = parseXML.add_track(extracted)
+    track.trackHasContentHash = 'hash1'
+    meter_classes.classify_meters(meter_list, [4.85, 0.2], [0.0, 0.0])
+
+    index = index_world()
+    index.merge(index_world())
+
+    assert 'track_instance' not in index.tracks
+    assert index.tracks.count('IndexedTrack') == 1
+    assert ('IndexedTrack', 1, 2) in index.followed_by(VP.name, LN.name)
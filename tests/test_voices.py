@@ -0,0 +1,23 @@
+from music21 import chord, note, stream
+
+import parseXML
+
+
+def test_melody_of_a_measure_with_voices():
+    # voice 1 is the melody, voice 2 is left out, the notes outside the voices are kept (like stream_xml)
+    measure = stream.Measure(number=1)
+    first, second = stream.Voice(id='1'), stream.Voice(id='2')
+    first.append([note.Note('E5'), note.Note('D5')])
+    second.append([note.Note('C3'), note.Note('G2')])
+    measure.insert(0, first)
+    measure.insert(0, second)
+    measure.insert(2, note.Note('C5'))
+    measure.insert(3, chord.Chord(['E4', 'A4']))
+    part = stream.Part([measure])
+    score = stream.Score([part])
+
+    notes, chords, rests, dynamics, articulations = parseXML.get_measure_notes(
+        None, score, 1, parseXML.index_score_measures(score))
+
+    assert [n.nameWithOctave for n in notes] == ['E5', 'D5', 'C5', 'A4']
+    assert len(chords) == 1